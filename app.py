@@ -1,30 +1,121 @@
 import os
-import requests
+import json
 import time
+import warnings
+import threading
+import queue
+import bisect
+import hashlib
+import gc
+import multiprocessing
+import sqlite3
+import shutil
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
 from datetime import datetime, timedelta
-from collections import defaultdict
-from flask import Flask, render_template, request, jsonify, send_file
+from contextlib import contextmanager
+from flask import Flask, Request, Response, current_app, g, has_request_context, render_template, request, jsonify, send_file
 import pandas as pd
 import numpy as np
 import joblib
 import tempfile
 import io
 from werkzeug.utils import secure_filename
-from sklearn.preprocessing import StandardScaler, LabelEncoder
+
+# scikit-learn (pulled in by unpickling the models and by tree_engine) and requests (only used
+# for ExoAI chat) are imported where they are needed, so importing this module stays fast
+
+try:
+    import orjson  # Optional: encodes columnar responses straight from numpy arrays
+except ImportError:
+    orjson = None
+
+# Output formats supported by the streaming mode of /predict_csv
+STREAM_FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+# Mission value that scores a merged catalog, routing each row to the mission its columns match
+AUTO_MISSION = 'auto'
+
+# JSON shapes of a /predict_csv response (?format=): one object per row, one array per field,
+# or counts only, with the rows fetched in pages from /results/<result_id>
+RESPONSE_FORMATS = ('records', 'columns', 'summary')
+
+class HashingStream:
+    """File wrapper that hashes and counts an upload while Werkzeug spools it to disk."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.stream.write(data)
+
+    def hexdigest(self):
+        return self.sha256.hexdigest()
+
+    def __iter__(self):
+        return iter(self.stream)
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+class ExoFinderRequest(Request):
+    """Request class that hashes uploads as they arrive and lifts the size limit for streamed and job uploads."""
+
+    def _get_file_stream(self, *args, **kwargs):
+        # Content hash of every uploaded file is known as soon as parsing finishes
+        return HashingStream(super()._get_file_stream(*args, **kwargs))
+
+    @property
+    def max_content_length(self):
+        # Streamed and job uploads are spooled to disk by Werkzeug and read back in chunks,
+        # so they are not bound by the in-memory MAX_CONTENT_LENGTH limit
+        if self.path == '/jobs' or (self.path == '/predict_csv' and self.args.get('stream') in STREAM_FORMATS):
+            return current_app.config['STREAM_MAX_CONTENT_LENGTH']
+        return current_app.config['MAX_CONTENT_LENGTH']
 
 app = Flask(__name__)
+app.request_class = ExoFinderRequest
 
-# Rate limiting for ExoAI chat
-chat_requests = defaultdict(list)
-CHAT_RATE_LIMIT = 15  # requests per minute
+# Rate limiting for ExoAI chat: a token bucket per client IP (CHAT_RATE_LIMIT=0 disables it).
+# CHAT_RATE_LIMIT_DB names a sqlite file that makes the limit hold across gunicorn workers
+CHAT_RATE_LIMIT = int(os.environ.get('CHAT_RATE_LIMIT', 15))  # requests per minute
 CHAT_TIME_WINDOW = 60  # seconds
+CHAT_RATE_LIMIT_DB = os.environ.get('CHAT_RATE_LIMIT_DB', '')
+CHAT_RATE_LIMIT_MAX_KEYS = int(os.environ.get('CHAT_RATE_LIMIT_MAX_KEYS', 100000))  # in-process backend only
 
-# Secure API key from environment variable
+# Secure API key from environment variable; without it the app still scores catalogs but ExoAI chat is off
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 if not GEMINI_API_KEY:
-    raise EnvironmentError("GEMINI_API_KEY is not set. Please configure it as an environment variable.")
-GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent"
+    print("Warning: GEMINI_API_KEY is not set; ExoAI chat is disabled")
+# Gemini endpoints; point GEMINI_API_URL at a local stub server to test without the real API
+GEMINI_API_URL = os.getenv('GEMINI_API_URL', "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent")
+GEMINI_STREAM_URL = os.getenv('GEMINI_STREAM_URL', GEMINI_API_URL.replace(':generateContent', ':streamGenerateContent'))
+# Concurrent Gemini calls per worker (also the keep-alive pool size) and how long a request
+# waits for a free slot before getting a 503
+GEMINI_MAX_CONCURRENCY = int(os.environ.get('GEMINI_MAX_CONCURRENCY', 8))
+GEMINI_QUEUE_TIMEOUT = float(os.environ.get('GEMINI_QUEUE_TIMEOUT', 10))
+GEMINI_CONNECT_TIMEOUT = float(os.environ.get('GEMINI_CONNECT_TIMEOUT', 5))
+GEMINI_READ_TIMEOUT = float(os.environ.get('GEMINI_READ_TIMEOUT', 30))
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['STREAM_MAX_CONTENT_LENGTH'] = None  # No limit when streaming (?stream=ndjson|csv) or for /jobs
+CSV_CHUNK_SIZE = int(os.environ.get('CSV_CHUNK_SIZE', 50000))  # Rows per chunk in streaming mode
+
+# Catalog upload formats, detected from the file's leading bytes: (magic, format, CSV compression)
+INPUT_SIGNATURES = [
+    (b'PAR1', 'parquet', None),
+    (b'ARROW1', 'arrow', None),                 # Arrow IPC file, also Feather v2
+    (b'\xff\xff\xff\xff', 'arrow_stream', None),  # Arrow IPC stream
+    (b'\x1f\x8b', 'csv', 'gzip'),
+    (b'\x28\xb5\x2f\xfd', 'csv', 'zstd'),
+]
+INPUT_EXTENSIONS = ('.csv', '.gz', '.zst', '.zstd', '.parquet', '.pq', '.feather', '.arrow', '.ipc', '.arrows')
 
 # Global variable to store the loaded model
 model = None
@@ -33,6 +124,7 @@ model = None
 MISSION_CONFIGS = {
     'kepler': {
         'model_path': 'kepler_rf_model.pkl',
+        'imputation_path': 'kepler_imputation.pkl',
         'required_features': [
             'koi_period', 'koi_duration', 'koi_depth', 'koi_prad', 
             'koi_teq', 'koi_srho', 'koi_sma', 'koi_incl', 'koi_insol',
@@ -44,6 +136,7 @@ MISSION_CONFIGS = {
     'k2': {
         'model_path': 'k2_stacked_model.pkl',
         'scaler_path': 'k2_scaler.pkl',
+        'imputation_path': 'k2_imputation.pkl',
         'required_features': [
             'pl_orbper', 'pl_orbsmax', 'pl_rade', 'pl_radj', 'pl_masse', 'pl_massj',
             'pl_trandep', 'pl_trandur', 'pl_ratdor', 'pl_ratror', 'pl_occdep',
@@ -52,163 +145,1782 @@ MISSION_CONFIGS = {
             'sy_dist', 'sy_pm', 'sy_bmag', 'sy_vmag', 'sy_jmag', 'sy_hmag', 'sy_kmag',
             'k2_campaigns_num', 'pl_orbeccen', 'pl_insol'
         ],
-        'identifier_columns': ['pl_name']
+        'identifier_columns': ['pl_name'],
+        # K2 model uses classes 0, 1, and 2: 0=FALSE POSITIVE, 1=CANDIDATE, 2=CONFIRMED
+        'class_labels': {0: 'FALSE POSITIVE', 1: 'CANDIDATE', 2: 'CONFIRMED'}
     },
     'tess': {
         'model_path': 'tess_model.pkl',
         'scaler_path': 'tess_scaler.pkl',
+        'imputation_path': 'tess_imputation.pkl',
         'label_encoder_path': 'tess_label_encoder.pkl',
         'required_features': [
             'pl_orbper', 'pl_trandurh', 'pl_trandep', 'pl_rade', 'pl_insol', 
             'pl_eqt', 'st_teff', 'st_logg', 'st_rad', 'st_tmag', 'st_dist'
         ],
-        'identifier_columns': ['toi']
+        'identifier_columns': ['toi'],
+        # TESS label encoder abbreviations mapped to full names
+        'class_labels': {
+            'APC': 'Astrophysical False Positive - Centroid',
+            'CP': 'Confirmed Planet',
+            'FA': 'False Alarm',
+            'FP': 'False Positive',
+            'KP': 'Known Planet',
+            'PC': 'Planet Candidate'
+        }
     }
 }
 
-# Global variables to store the loaded models, scalers, and label encoders
+# Re-run predict() alongside every predict_proba call and fail on disagreement (debugging aid)
+VERIFY_PREDICTIONS = os.environ.get('VERIFY_PREDICTIONS', '').lower() in ('1', 'true', 'yes')
+
+# Missions whose model runs on the flattened tree engine instead of scikit-learn (comma-separated)
+TREE_ENGINE_MISSIONS = {m.strip() for m in os.environ.get('TREE_ENGINE_MISSIONS', '').split(',') if m.strip()}
+
+# On-disk cache of /predict_csv responses keyed by upload hash, mission and model version
+CSV_CACHE_DIR = os.environ.get('CSV_CACHE_DIR', 'result_cache')  # '' disables the cache
+CSV_CACHE_MAX_BYTES = int(os.environ.get('CSV_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+# Server-side store of /predict_csv results, downloadable by result ID until they expire
+RESULT_STORE_DIR = os.environ.get('RESULT_STORE_DIR', 'result_store')
+RESULT_STORE_TTL = float(os.environ.get('RESULT_STORE_TTL', 24 * 3600))  # seconds
+DOWNLOAD_CHUNK_ROWS = 50000  # Rows serialised per chunk when streaming a CSV download
+RESULTS_PAGE_MAX_ROWS = int(os.environ.get('RESULTS_PAGE_MAX_ROWS', 1000))  # Largest /results page
+RESULT_VIEW_CACHE_SIZE = int(os.environ.get('RESULT_VIEW_CACHE_SIZE', 8))  # Sorted/filtered row orders kept per worker
+
+# Per-identifier index of last predictions, so re-uploaded catalogs only score changed rows
+SCORE_INDEX_DB = os.environ.get('SCORE_INDEX_DB', '')  # e.g. score_index.db; '' disables incremental scoring
+SCORE_INDEX_MAX_ENTRIES = int(os.environ.get('SCORE_INDEX_MAX_ENTRIES', 1000000))  # Per mission; oldest go first
+
+# Asynchronous batch-scoring jobs: status files, worker processes, queue bound and CPU niceness
+JOB_DIR = os.environ.get('JOB_DIR', 'jobs')
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 1))
+JOB_MAX_QUEUED = int(os.environ.get('JOB_MAX_QUEUED', 16))
+JOB_WORKER_NICE = int(os.environ.get('JOB_WORKER_NICE', 10))  # Keeps jobs behind interactive requests
+
+# Row-sharded parallel scoring of large batches: default shard count, backend ('thread' or
+# 'process') and the batch size below which sharding is not worth its overhead
+SCORING_SHARDS = int(os.environ.get('SCORING_SHARDS', 1))
+SCORING_BACKEND = os.environ.get('SCORING_BACKEND', 'thread')
+SHARD_MIN_ROWS = int(os.environ.get('SHARD_MIN_ROWS', 10000))
+
+# Micro-batching of concurrent /predict_manual requests (MANUAL_BATCH_MAX_ROWS=0 disables it)
+MANUAL_BATCH_MAX_ROWS = int(os.environ.get('MANUAL_BATCH_MAX_ROWS', 32))
+MANUAL_BATCH_WAIT_MS = float(os.environ.get('MANUAL_BATCH_WAIT_MS', 2))
+
+# Result cache for /predict_manual: entries, time-to-live and optional sqlite file shared by workers
+MANUAL_CACHE_SIZE = int(os.environ.get('MANUAL_CACHE_SIZE', 4096))  # 0 disables the cache
+MANUAL_CACHE_TTL = float(os.environ.get('MANUAL_CACHE_TTL', 3600))  # seconds
+MANUAL_CACHE_DB = os.environ.get('MANUAL_CACHE_DB', '')
+
+# Answer cache for /api/chat; CHAT_CACHE_DB names a sqlite file that keeps answers across
+# restarts and shares them between workers
+CHAT_CACHE_SIZE = int(os.environ.get('CHAT_CACHE_SIZE', 512))  # 0 disables the cache
+CHAT_CACHE_TTL = float(os.environ.get('CHAT_CACHE_TTL', 86400))  # seconds
+CHAT_CACHE_DB = os.environ.get('CHAT_CACHE_DB', '')
+
+# Default values for required features that are entirely absent from an upload when the
+# mission has no imputation profile (any other absent feature is filled with 0)
+FEATURE_DEFAULTS = {
+    'pl_orbeccen': 0.1,  # Typical low eccentricity for planets
+    'pl_insol': 1.0,  # Earth-like insolation as default
+}
+
+# Latency histogram buckets (seconds) for /metrics, and per-request JSON timing logs on stdout
+METRICS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TIMING_LOG = os.environ.get('TIMING_LOG', '').lower() in ('1', 'true', 'yes')
+
+class Metrics:
+    """Prometheus-style counters and latency histograms kept in process memory.
+
+    Each gunicorn worker keeps its own series; /metrics reports the worker that
+    answers the scrape, with its pid as a label so series from different workers
+    never get mixed up.
+    """
+
+    def __init__(self, buckets=METRICS_BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.descriptions = {}
+        self.counters = {}
+        self.histograms = {}
+
+    def describe(self, name, kind, description):
+        self.descriptions[name] = (kind, description)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.histograms.get(key)
+            if series is None:
+                series = self.histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ''
+        escape = lambda value: str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        return '{' + ','.join(f'{key}="{escape(value)}"' for key, value in pairs) + '}'
+
+    def render(self):
+        """All series in the Prometheus text exposition format."""
+        process = (('pid', os.getpid()),)
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((key, (list(series[0]), series[1], series[2])) for key, series in self.histograms.items())
+        lines = []
+        described = set()
+
+        def header(name):
+            if name not in described and name in self.descriptions:
+                kind, description = self.descriptions[name]
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} {kind}")
+                described.add(name)
+
+        for (name, labels), value in counters:
+            header(name)
+            lines.append(f"{name}{self._labels(labels, process)} {value}")
+        for (name, labels), (bucket_counts, total, count) in histograms:
+            header(name)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{self._labels(labels, process + (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_bucket{self._labels(labels, process + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{self._labels(labels, process)} {total}")
+            lines.append(f"{name}_count{self._labels(labels, process)} {count}")
+        return '\n'.join(lines) + '\n'
+
+metrics = Metrics()
+metrics.describe('exofinder_requests_total', 'counter', 'HTTP requests by endpoint and status code')
+metrics.describe('exofinder_request_seconds', 'histogram', 'Time to produce a response (streamed bodies excluded)')
+metrics.describe('exofinder_stage_seconds', 'histogram', 'Time spent in each processing stage')
+metrics.describe('exofinder_rows_total', 'counter', 'Candidate rows scored')
+metrics.describe('exofinder_rows_reused_total', 'counter', 'Candidate rows answered from the score index')
+metrics.describe('exofinder_model_load_seconds', 'histogram', 'Model, scaler and encoder load time')
+
+def current_endpoint():
+    # Streamed response bodies are produced after their request has ended
+    return request.endpoint if has_request_context() and request.endpoint else 'background'
+
+@contextmanager
+def timed_stage(stage, mission=''):
+    """Time a block into exofinder_stage_seconds, and into the request's timing log entry."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.observe('exofinder_stage_seconds', elapsed, endpoint=current_endpoint(), stage=stage, mission=mission)
+        if has_request_context():
+            timings = g.setdefault('stage_timings', {})
+            timings[stage] = timings.get(stage, 0.0) + elapsed
+
+def count_rows(mission, n_rows):
+    metrics.inc('exofinder_rows_total', n_rows, endpoint=current_endpoint(), mission=mission)
+    if has_request_context():
+        g.rows = g.get('rows', 0) + n_rows
+        g.mission = mission
+
+# Global variables to store the loaded models, scalers, label encoders and inference pipelines
 models = {}
 scalers = {}
 label_encoders = {}
+pipelines = {}
+
+# SHA-256 of each loaded artifact file and the measured load time of each mission
+artifact_hashes = {}
+load_times = {}
+
+# Load state of each mission ('pending', 'loading', 'loaded' or 'failed') for /readyz, and the
+# lock that makes concurrent load_model calls for one mission share a single load
+model_states = {mission: {'state': 'pending'} for mission in MISSION_CONFIGS}
+model_load_locks = {mission: threading.Lock() for mission in MISSION_CONFIGS}
+APP_STARTED = time.time()
 
 # Legacy support - keep for backward compatibility
 model = None
 REQUIRED_FEATURES = MISSION_CONFIGS['kepler']['required_features']
 
-def load_model(mission='kepler'):
-    """Load model and scaler for the specified mission."""
-    global models, scalers, label_encoders, model
+class MissionPipeline:
+    """Inference pipeline for one mission, built once when its model is loaded.
+
+    Holds everything a request needs as plain numpy data (feature layout, default
+    fill vector, scaler statistics and class label lookup) so scoring a batch is a
+    column gather, an imputation, an affine scale and one predict_proba/argmax.
+    """
+
+    def __init__(self, mission, model, scaler=None, label_encoder=None, version='', imputation=None):
+        config = MISSION_CONFIGS[mission]
+        self.mission = mission
+        self.model = model
+        # Content hash of the model/scaler/encoder artifacts; changes whenever a .pkl is replaced
+        self.version = version
+        self.scaler = scaler
+        self.features = list(config['required_features'])
+        self.feature_index = {feature: i for i, feature in enumerate(self.features)}
+        self.default_values = np.array([FEATURE_DEFAULTS.get(f, 0.0) for f in self.features], dtype=np.float64)
+
+        # Training-set fill value of every feature (see imputation_profiles.py). With a profile, absent
+        # columns and missing cells both get it, so a row's prediction never depends on the rest of its batch
+        self.fill_values = None
+        if imputation is not None:
+            profile = dict(zip(imputation['features'], imputation['values']))
+            self.fill_values = np.array(
+                [profile.get(f, default) for f, default in zip(self.features, self.default_values)], dtype=np.float64
+            )
+            self.default_values = self.fill_values
+
+        # StandardScaler is applied as (X - mean) / scale directly in numpy
+        from sklearn.preprocessing import StandardScaler
+        self.scale_mean = None
+        self.scale_std = None
+        if isinstance(scaler, StandardScaler):
+            self.scale_mean = scaler.mean_ if scaler.with_mean else np.zeros(len(self.features))
+            self.scale_std = scaler.scale_ if scaler.with_std else np.ones(len(self.features))
+
+        # Trees compare float32 inputs, so unscaled features can be parsed and imputed in float32;
+        # scaled features stay float64 until after the scaler
+        self.input_dtype = np.float32 if scaler is None else np.float64
 
-    if mission in models and models[mission] is not None:
+        # Display label for each model output column, indexed by argmax of predict_proba
+        self.classes = model.classes_
+        self.class_labels = np.array(self._display_labels(config, label_encoder), dtype=object)
+
+        # Estimator that produces probabilities: the model itself or its flattened tree engine
+        self.estimator = model
+        if mission in TREE_ENGINE_MISSIONS:
+            self.enable_tree_engine()
+
+    def _display_labels(self, config, label_encoder):
+        raw_classes = self.classes.tolist()
+        class_labels = config.get('class_labels')
+        if 'label_encoder_path' in config:
+            if label_encoder is None:
+                # Fallback if label encoder is not available
+                return [f'CLASS_{cls}' for cls in raw_classes]
+            # Decode classes using label encoder and expand abbreviations
+            decoded = label_encoder.inverse_transform(self.classes).tolist()
+            return [class_labels.get(cls, cls) for cls in decoded]
+        if class_labels:
+            return [class_labels.get(cls, f'UNKNOWN_CLASS_{cls}') for cls in raw_classes]
+        # Model already returns proper labels
+        return raw_classes
+
+    def probe_batch(self, n_rows=64):
+        """Deterministic synthetic model input used for load-time self checks."""
+        return np.random.default_rng(0).normal(size=(n_rows, len(self.features)))
+
+    def enable_tree_engine(self):
+        """Switch to the flattened tree engine if it supports the model and reproduces predict_proba."""
+        import tree_engine
+        try:
+            engine = tree_engine.compile_model(self.model)
+            probe = self.probe_batch()
+            if not np.allclose(engine.predict_proba(probe), self.model.predict_proba(probe), rtol=0, atol=1e-9):
+                raise RuntimeError("probabilities differ from predict_proba")
+        except (ValueError, RuntimeError) as e:
+            print(f"Warning: {self.mission} tree engine disabled, using scikit-learn: {str(e)}")
+            return False
+        print(f"Using flattened tree engine for {self.mission} model")
+        self.estimator = engine
         return True
 
-    config = MISSION_CONFIGS[mission]
+    def prepare(self, df):
+        """Build the imputed, unscaled feature matrix for a dataframe of candidates."""
+        # IMPORTANT: Always use ALL required features for model compatibility
+        available = [f for f in self.features if f in df.columns]
+        if len(available) == 0:
+            raise ValueError("No required features found in the data")
 
+        # Start from the defaults so truly missing features need no extra pass
+        X = np.tile(self.default_values.astype(self.input_dtype), (len(df), 1))
+        for feature in available:
+            X[:, self.feature_index[feature]] = coerce_numeric(df[feature]).to_numpy(dtype=self.input_dtype, na_value=np.nan)
+
+        missing_features = [f for f in self.features if f not in df.columns]
+        if missing_features:
+            print(f"Warning: Missing features filled with defaults: {missing_features}")
+
+        # Handle missing values with the imputation profile, or else the column median of this batch
+        nan_rows, nan_cols = np.nonzero(np.isnan(X))
+        if len(nan_rows):
+            if self.fill_values is not None:
+                fill = self.fill_values
+            else:
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore', RuntimeWarning)  # All-NaN columns are handled below
+                    fill = np.nanmedian(X, axis=0)
+                # A sparse column can be empty in one chunk of a streamed upload; use its default there
+                fill = np.where(np.isnan(fill), self.default_values, fill)
+            X[nan_rows, nan_cols] = fill[nan_cols]
+        return X
+
+    def scale(self, X):
+        """Apply the mission scaler (if any) to a feature matrix."""
+        if self.scale_mean is not None:
+            return (X - self.scale_mean) / self.scale_std
+        if self.scaler is not None:
+            return self.scaler.transform(X)
+        return X
+
+    def transform(self, df):
+        """Preprocess a dataframe into the model input matrix."""
+        return self.scale(self.prepare(df))
+
+    def predict(self, X):
+        """Return display labels, confidences and the probability matrix for a model input matrix.
+
+        The ensemble runs once: the predicted class is the argmax of predict_proba over classes_,
+        which is what predict() computes internally for the forest and stacked models.
+        """
+        probabilities = self.estimator.predict_proba(X)
+        best = np.argmax(probabilities, axis=1)
+        if VERIFY_PREDICTIONS:
+            self.check_consistency(X, best)
+        confidences = probabilities[np.arange(len(best)), best]
+        return self.class_labels[best], confidences, probabilities
+
+    def check_consistency(self, X, best=None):
+        """Raise RuntimeError if the argmax of predict_proba disagrees with model.predict() on X."""
+        if best is None:
+            best = np.argmax(self.estimator.predict_proba(X), axis=1)
+        expected = np.asarray(self.model.predict(X))
+        mismatched = np.flatnonzero(self.classes[best] != expected)
+        if len(mismatched):
+            raise RuntimeError(
+                f"{self.mission} predict_proba argmax disagrees with predict() on "
+                f"{len(mismatched)} of {len(best)} rows (first row {mismatched[0]})"
+            )
+
+class MicroBatcher:
+    """Collects concurrent single-row predictions into one batched predict call.
+
+    A background thread takes the first queued row, keeps collecting until it has
+    max_batch_size rows or max_wait_ms has passed, runs predict_fn once on the
+    stacked rows and hands each caller its own row of the result.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=MANUAL_BATCH_MAX_ROWS, max_wait_ms=MANUAL_BATCH_WAIT_MS):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.pid = os.getpid()
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        # Histogram buckets are upper bounds on batch size: 1, 2, 4, ... max_batch_size
+        self.bucket_bounds = sorted({min(2 ** i, max_batch_size) for i in range(max_batch_size.bit_length() + 1)})
+        self.batch_size_counts = [0] * len(self.bucket_bounds)
+        self.batches = 0
+        self.rows = 0
+        self.max_queue_depth = 0
+        self.worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self.worker.start()
+
+    def submit(self, row):
+        """Queue one feature row and block until its (label, confidence, probabilities) are ready."""
+        future = Future()
+        self.queue.put((row, future))
+        with self.lock:
+            self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+        return future.result()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._predict_batch(batch)
+
+    def _predict_batch(self, batch):
+        rows, futures = zip(*batch)
+        try:
+            labels, confidences, probabilities = self.predict_fn(np.vstack(rows))
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+        else:
+            for i, future in enumerate(futures):
+                future.set_result((labels[i], confidences[i], probabilities[i]))
+        with self.lock:
+            self.batches += 1
+            self.rows += len(batch)
+            self.batch_size_counts[bisect.bisect_left(self.bucket_bounds, len(batch))] += 1
+
+    def stats(self):
+        """Queue depth, batch counters and batch-size histogram for monitoring."""
+        with self.lock:
+            return {
+                'queue_depth': self.queue.qsize(),
+                'max_queue_depth': self.max_queue_depth,
+                'batches': self.batches,
+                'rows': self.rows,
+                'mean_batch_size': round(self.rows / self.batches, 2) if self.batches else 0.0,
+                'batch_size_histogram': {
+                    f'le_{bound}': count for bound, count in zip(self.bucket_bounds, self.batch_size_counts)
+                },
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000.0
+            }
+
+# Per-mission micro-batchers, created lazily in each worker process
+batchers = {}
+batchers_lock = threading.Lock()
+
+def predict_row(mission, row):
+    """Predict a single feature row, micro-batched with concurrent requests when enabled."""
+    if MANUAL_BATCH_MAX_ROWS <= 1:
+        labels, confidences, probabilities = pipelines[mission].predict(row[np.newaxis, :])
+        return labels[0], confidences[0], probabilities[0]
+
+    with batchers_lock:
+        batcher = batchers.get(mission)
+        # Worker threads do not survive fork, so a batcher inherited from the parent is replaced
+        if batcher is None or batcher.pid != os.getpid():
+            batcher = batchers[mission] = MicroBatcher(lambda X: pipelines[mission].predict(X))
+    return batcher.submit(row)
+
+class ResultCache:
+    """Bounded LRU cache with per-entry TTL, optionally backed by a sqlite file shared by workers.
+
+    Keys are strings and values JSON-serialisable. Lookups check the in-process LRU first
+    and fall back to the shared sqlite table, whose hits are copied into the local LRU.
+    """
+
+    def __init__(self, max_entries, ttl_seconds, db_path=''):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.db_path = db_path
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.db = None
+        self.db_pid = None
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _connection(self):
+        # sqlite connections must not cross fork, so each worker process opens its own
+        if self.db is None or self.db_pid != os.getpid():
+            self.db = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS cache '
+                '(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL, used REAL NOT NULL)'
+            )
+            self.db_pid = os.getpid()
+        return self.db
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss or expired entry."""
+        if self.max_entries <= 0:
+            return None
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > now:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self.entries[key]
+
+            if self.db_path:
+                try:
+                    db = self._connection()
+                    row = db.execute('SELECT value, expires FROM cache WHERE key = ?', (key,)).fetchone()
+                    if row is not None and row[1] > now:
+                        db.execute('UPDATE cache SET used = ? WHERE key = ?', (now, key))
+                        db.commit()
+                        value = json.loads(row[0])
+                        self._store_local(key, row[1], value)
+                        self.hits += 1
+                        self.shared_hits += 1
+                        return value
+                except sqlite3.Error as e:
+                    print(f"Warning: shared result cache read failed: {str(e)}")
+
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        """Store value under key for ttl seconds, evicting least recently used entries."""
+        if self.max_entries <= 0:
+            return
+        expires = time.time() + self.ttl
+        with self.lock:
+            self._store_local(key, expires, value)
+            if self.db_path:
+                try:
+                    db = self._connection()
+                    db.execute(
+                        'INSERT OR REPLACE INTO cache (key, value, expires, used) VALUES (?, ?, ?, ?)',
+                        (key, json.dumps(value), expires, time.time())
+                    )
+                    db.execute('DELETE FROM cache WHERE expires <= ?', (time.time(),))
+                    db.execute(
+                        'DELETE FROM cache WHERE key IN '
+                        '(SELECT key FROM cache ORDER BY used DESC LIMIT -1 OFFSET ?)',
+                        (self.max_entries,)
+                    )
+                    db.commit()
+                except sqlite3.Error as e:
+                    print(f"Warning: shared result cache write failed: {str(e)}")
+
+    def _store_local(self, key, expires, value):
+        self.entries[key] = (expires, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        """Hit/miss counters and current size for monitoring."""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'shared_backend': self.db_path or None
+            }
+
+manual_cache = ResultCache(MANUAL_CACHE_SIZE, MANUAL_CACHE_TTL, MANUAL_CACHE_DB)
+
+def manual_cache_key(mission, row):
+    """Cache key from mission, model version and the canonical bytes of the feature vector."""
+    canonical = np.asarray(row, dtype=np.float64) + 0.0  # Folds -0.0 into 0.0
+    canonical[np.isnan(canonical)] = np.nan  # One NaN bit pattern
+    digest = hashlib.sha256(canonical.tobytes()).hexdigest()
+    return f"{mission}:{pipelines[mission].version}:{digest}"
+
+def predict_row_cached(mission, row):
+    """predict_row with results served from and stored in the manual prediction cache."""
+    key = manual_cache_key(mission, row)
+    cached = manual_cache.get(key)
+    if cached is not None:
+        return cached
+    label, confidence, probabilities = predict_row(mission, row)
+    result = (label, float(confidence), [float(p) for p in probabilities])
+    manual_cache.put(key, result)
+    return result
+
+class FileResultCache:
+    """Content-addressed on-disk cache of serialised responses, bounded by total bytes.
+
+    Each entry is one file; its mtime is refreshed on every hit, so evicting the oldest
+    mtimes first gives LRU order across all worker processes sharing the directory.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.evictions = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key, upload_size=0):
+        """Return the cached body for key, or None. upload_size counts toward bytes saved on a hit."""
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                body = f.read()
+            os.utime(path)
+        except OSError:
+            with self.lock:
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+            self.bytes_saved += upload_size
+        return body
+
+    def record_miss(self):
+        """Count a lookup answered without reading the cache, e.g. because the result it points at is gone."""
+        if self.directory:
+            with self.lock:
+                self.misses += 1
+
+    def put(self, key, body):
+        """Store body under key, then evict least recently used entries beyond max_bytes."""
+        if not self.directory or len(body) > self.max_bytes:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, self._path(key))
+            self._evict()
+        except OSError as e:
+            print(f"Warning: result cache write failed: {str(e)}")
+
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.json'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue  # Evicted by another worker
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                with self.lock:
+                    self.evictions += 1
+            except OSError:
+                pass
+            total -= size
+
+    def stats(self):
+        """Cache size, hit rate and upload bytes that did not need processing."""
+        entries = self._entries() if self.directory and os.path.isdir(self.directory) else []
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(entries),
+                'size_bytes': sum(size for _, size, _ in entries),
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'bytes_saved': self.bytes_saved
+            }
+
+csv_result_cache = FileResultCache(CSV_CACHE_DIR, CSV_CACHE_MAX_BYTES)
+
+class ResultStore:
+    """Columnar on-disk store of prediction results, one directory per result ID.
+
+    Every column is a separate .npy file (class labels as integer codes) that is
+    memory-mapped on read, so a download or a window of rows only touches the pages
+    it needs. Results expire RESULT_STORE_TTL seconds after they are saved.
+    """
+
+    def __init__(self, directory, ttl_seconds):
+        self.directory = directory
+        self.ttl = ttl_seconds
+
+    def _path(self, result_id):
+        # IDs are hex strings we generate; anything else can never name a stored result
+        if not result_id or not all(c in '0123456789abcdef' for c in result_id):
+            return None
+        return os.path.join(self.directory, result_id)
+
+    def save(self, results_df, mission, result_id=None):
+        """Persist a results dataframe and return its result ID."""
+        result_id = result_id or uuid.uuid4().hex
+        path = self._path(result_id)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        os.makedirs(tmp_path)
+        columns = {}
+        for column in results_df.columns:
+            values = results_df[column]
+            if column == 'Predicted_Class':
+                codes, labels = pd.factorize(values)
+                np.save(os.path.join(tmp_path, f'{column}.npy'), codes.astype(np.int16))
+                columns[column] = {'kind': 'category', 'labels': [str(label) for label in labels]}
+            elif pd.api.types.is_numeric_dtype(values):
+                np.save(os.path.join(tmp_path, f'{column}.npy'), values.to_numpy())
+                columns[column] = {'kind': 'numeric'}
+            else:
+                # Fixed-width unicode rather than object dtype, so the column can be memory-mapped
+                np.save(os.path.join(tmp_path, f'{column}.npy'), values.astype(str).to_numpy(dtype=str))
+                columns[column] = {'kind': 'string'}
+        with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+            json.dump({'mission': mission, 'total_rows': len(results_df), 'created': time.time(),
+                       'columns': columns}, f)
+        try:
+            os.replace(tmp_path, path)
+        except OSError:
+            # The same content-addressed result was saved concurrently; keep the existing copy
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        self.purge_expired()
+        return result_id
+
+    def load(self, result_id):
+        """Return (meta, {column: memory-mapped array}) or None if missing or expired."""
+        path = self._path(result_id)
+        if path is None:
+            return None
+        try:
+            with open(os.path.join(path, 'meta.json')) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - meta['created'] > self.ttl:
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+        arrays = {column: np.load(os.path.join(path, f'{column}.npy'), mmap_mode='r') for column in meta['columns']}
+        return meta, arrays
+
+    def exists(self, result_id):
+        return self.load(result_id) is not None
+
+    def frame(self, meta, arrays, start=0, stop=None, rows=None):
+        """Materialise rows [start, stop) of a stored result, or the given row numbers, as a dataframe."""
+        data = {}
+        for column, info in meta['columns'].items():
+            values = np.asarray(arrays[column][start:stop] if rows is None else arrays[column][rows])
+            if info['kind'] == 'category':
+                values = np.asarray(info['labels'], dtype=object)[values]
+            data[column] = values
+        return pd.DataFrame(data)
+
+    def purge_expired(self):
+        """Delete every stored result older than the TTL."""
+        cutoff = time.time() - self.ttl
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return
+        for entry in entries:
+            if entry.is_dir() and not entry.name.endswith('.tmp'):
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        shutil.rmtree(entry.path, ignore_errors=True)
+                except OSError:
+                    pass
+
+result_store = ResultStore(RESULT_STORE_DIR, RESULT_STORE_TTL)
+
+# Row orders of recently viewed sorted/filtered results (results never change once stored)
+result_views = OrderedDict()
+result_views_lock = threading.Lock()
+
+def column_sort_key(info, values):
+    """Numeric sort key of a stored column: the values themselves, or the rank of each label."""
+    if info['kind'] == 'category':
+        labels = np.asarray(info['labels'], dtype=str)
+        return np.argsort(np.argsort(labels, kind='stable'))[values]
+    if info['kind'] == 'string':
+        # Identifiers such as toi (e.g. '201.01') are stored as strings but must sort as numbers
+        numbers = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=np.float64)
+        if not (np.isnan(numbers) & ~np.isin(values, ('', 'nan', 'None'))).any():
+            return np.unique(numbers, return_inverse=True)[1]
+        return np.unique(values, return_inverse=True)[1]
+    return values
+
+def result_view(result_id, meta, arrays, sort=None, descending=False, classes=(), missions=(),
+                min_confidence=None, max_confidence=None):
+    """Row numbers of a stored result that pass the filters, in sort order (None for all rows as stored).
+
+    Each view is computed once over the memory-mapped columns and kept in a small LRU,
+    so scrolling through a sorted or filtered table only slices an index array.
+    """
+    if sort is None and not (classes or missions) and min_confidence is None and max_confidence is None:
+        return None
+    key = (result_id, sort, descending, tuple(sorted(classes)), tuple(sorted(missions)), min_confidence, max_confidence)
+    with result_views_lock:
+        rows = result_views.get(key)
+        if rows is not None:
+            result_views.move_to_end(key)
+            return rows
+
+    mask = np.ones(meta['total_rows'], dtype=bool)
+    if classes:
+        codes = [code for code, label in enumerate(meta['columns']['Predicted_Class']['labels']) if label in classes]
+        mask &= np.isin(arrays['Predicted_Class'], codes)
+    if missions:
+        # Single-mission results have no Mission column; every row belongs to meta['mission']
+        if 'Mission' in arrays:
+            mask &= np.isin(arrays['Mission'], list(missions))
+        elif meta['mission'] not in missions:
+            mask[:] = False
+    if min_confidence is not None:
+        mask &= arrays['Confidence'] >= min_confidence
+    if max_confidence is not None:
+        mask &= arrays['Confidence'] <= max_confidence
+    rows = np.flatnonzero(mask)
+    if sort is not None:
+        sort_key = column_sort_key(meta['columns'][sort], np.asarray(arrays[sort])[rows])
+        # Negating the key keeps ties in stored order for descending sorts too
+        rows = rows[np.argsort(-sort_key if descending else sort_key, kind='stable')]
+
+    if RESULT_VIEW_CACHE_SIZE > 0:
+        with result_views_lock:
+            result_views[key] = rows
+            while len(result_views) > RESULT_VIEW_CACHE_SIZE:
+                result_views.popitem(last=False)
+    return rows
+
+def class_counts(meta, arrays):
+    """Rows per predicted class of a stored result."""
+    labels = meta['columns']['Predicted_Class']['labels']
+    counts = np.bincount(arrays['Predicted_Class'], minlength=len(labels))
+    return {label: int(count) for label, count in zip(labels, counts)}
+
+class ScoreIndex:
+    """Persistent sqlite index of the last prediction made for each catalog identifier.
+
+    Entries are keyed by mission, model version and identifier (kepoi_name, pl_name,
+    toi, ...) and hold a 64-bit fingerprint of the row's model input. A row whose identifier
+    and fingerprint match an entry reuses its prediction instead of being scored again.
+
+    Each process keeps the current model version's entries of a mission in memory and
+    matches a whole batch against them with one pandas index lookup. An entry is valid for
+    as long as its model version is, so the copy only needs to pick up what other processes
+    have added since it was read. Entries of other model versions are deleted when a
+    version is first used, and the oldest entries beyond SCORE_INDEX_MAX_ENTRIES per
+    mission are pruned.
+    """
+
+    # Rows stored by other processes are re-read with this much margin for unfinished commits
+    REFRESH_SLACK = 60.0
+
+    def __init__(self, db_path, max_entries=SCORE_INDEX_MAX_ENTRIES):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.db = None
+        self.db_pid = None
+        self.data_version = None
+        self.snapshots = {}
+        self.reused = 0
+        self.recomputed = 0
+
+    def _connection(self):
+        # sqlite connections must not cross fork, so each worker process opens its own
+        if self.db is None or self.db_pid != os.getpid():
+            self.db = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS row_scores '
+                '(mission TEXT NOT NULL, version TEXT NOT NULL, identifier TEXT NOT NULL, '
+                'fingerprint INTEGER NOT NULL, class_index INTEGER NOT NULL, confidence REAL NOT NULL, '
+                'updated REAL NOT NULL, PRIMARY KEY (mission, version, identifier)) WITHOUT ROWID'
+            )
+            self.db_pid = os.getpid()
+            self.data_version = None
+            self.snapshots = {}
+        return self.db
+
+    def _read(self, db, mission, version, since=None):
+        query = ('SELECT identifier, fingerprint, class_index, confidence FROM row_scores '
+                 'WHERE mission = ? AND version = ?')
+        params = (mission, version)
+        if since is not None:
+            query += ' AND updated >= ?'
+            params += (since,)
+        rows = db.execute(query, params).fetchall()
+        if not rows:
+            return None
+        identifiers, fingerprints, class_index, confidence = zip(*rows)
+        return (np.array(identifiers, dtype=object), np.array(fingerprints, dtype=np.int64),
+                np.array(class_index, dtype=np.intp), np.array(confidence, dtype=np.float64))
+
+    @staticmethod
+    def _merge(snapshot, identifiers, fingerprints, class_index, confidence):
+        """Insert or replace entries in an in-memory snapshot; the last duplicate of an identifier wins."""
+        new_keys = pd.Index(identifiers)
+        keep = ~new_keys.duplicated(keep='last')
+        if not keep.all():
+            new_keys, fingerprints, class_index, confidence = (
+                new_keys[keep], fingerprints[keep], class_index[keep], confidence[keep])
+        positions = snapshot['keys'].get_indexer(new_keys)
+        known = positions >= 0
+        for column, values in (('fingerprint', fingerprints), ('class_index', class_index), ('confidence', confidence)):
+            snapshot[column][positions[known]] = values[known]
+        if not known.all():
+            added = ~known
+            snapshot['keys'] = snapshot['keys'].append(new_keys[added])
+            for column, values in (('fingerprint', fingerprints), ('class_index', class_index), ('confidence', confidence)):
+                snapshot[column] = np.concatenate([snapshot[column], values[added]])
+
+    def _snapshot(self, db, mission, version):
+        """In-memory entries of a mission's current model version, read or refreshed from sqlite as needed."""
+        data_version = db.execute('PRAGMA data_version').fetchone()[0]
+        snapshot = self.snapshots.get(mission)
+        if snapshot is None or snapshot['version'] != version:
+            # A model version in use for the first time here: earlier versions' entries are dead
+            db.execute('DELETE FROM row_scores WHERE mission = ? AND version != ?', (mission, version))
+            db.commit()
+            read_at = time.time()
+            snapshot = {'version': version, 'read_at': read_at, 'keys': pd.Index([], dtype=object),
+                        'fingerprint': np.empty(0, dtype=np.int64), 'class_index': np.empty(0, dtype=np.intp),
+                        'confidence': np.empty(0)}
+            entries = self._read(db, mission, version)
+            if entries is not None:
+                self._merge(snapshot, *entries)
+            self.snapshots[mission] = snapshot
+        elif data_version != self.data_version:
+            # Another process has committed since the last look; pick up only what it stored
+            read_at = time.time()
+            entries = self._read(db, mission, version, since=snapshot['read_at'] - self.REFRESH_SLACK)
+            if entries is not None:
+                self._merge(snapshot, *entries)
+            snapshot['read_at'] = read_at
+        self.data_version = data_version
+        return snapshot
+
+    def lookup(self, mission, version, identifiers, fingerprints):
+        """Rows whose identifier has an entry with the same fingerprint, with that entry's class and confidence.
+
+        Returns (reused mask, class_index, confidence) aligned with the input rows.
+        """
+        n_rows = len(identifiers)
+        reused = np.zeros(n_rows, dtype=bool)
+        class_index = np.zeros(n_rows, dtype=np.intp)
+        confidence = np.zeros(n_rows)
+        with self.lock:
+            try:
+                snapshot = self._snapshot(self._connection(), mission, version)
+                positions = snapshot['keys'].get_indexer(identifiers)
+                found = np.flatnonzero(positions >= 0)
+                match = snapshot['fingerprint'][positions[found]] == fingerprints[found]
+                rows, positions = found[match], positions[found[match]]
+                reused[rows] = True
+                class_index[rows] = snapshot['class_index'][positions]
+                confidence[rows] = snapshot['confidence'][positions]
+            except sqlite3.Error as e:
+                print(f"Warning: score index read failed: {str(e)}")
+        return reused, class_index, confidence
+
+    def store(self, mission, version, identifiers, fingerprints, class_index, confidence):
+        """Insert or replace entries given as aligned arrays."""
+        if not len(identifiers):
+            return
+        now = time.time()
+        with self.lock:
+            try:
+                db = self._connection()
+                snapshot = self._snapshot(db, mission, version)
+                order = np.argsort(identifiers, kind='stable')  # Key order keeps B-tree inserts sequential
+                db.executemany(
+                    'INSERT OR REPLACE INTO row_scores '
+                    '(mission, version, identifier, fingerprint, class_index, confidence, updated) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    zip([mission] * len(order), [version] * len(order), identifiers[order].tolist(),
+                        fingerprints[order].tolist(), class_index[order].tolist(), confidence[order].tolist(),
+                        [now] * len(order))
+                )
+                db.commit()
+                self._merge(snapshot, identifiers, fingerprints, class_index, confidence)
+                if len(snapshot['keys']) > self.max_entries:
+                    self._prune(db, mission, version)
+            except sqlite3.Error as e:
+                print(f"Warning: score index write failed: {str(e)}")
+
+    def _prune(self, db, mission, version):
+        """Delete a mission's least recently stored entries down to 90% of max_entries and re-read the rest."""
+        db.execute(
+            'DELETE FROM row_scores WHERE mission = ? AND version = ? AND identifier IN '
+            '(SELECT identifier FROM row_scores WHERE mission = ? AND version = ? ORDER BY updated LIMIT ?)',
+            (mission, version, mission, version, len(self.snapshots[mission]['keys']) - int(self.max_entries * 0.9))
+        )
+        db.commit()
+        del self.snapshots[mission]
+        self._snapshot(db, mission, version)
+
+    def record(self, reused, recomputed):
+        with self.lock:
+            self.reused += reused
+            self.recomputed += recomputed
+
+    def stats(self):
+        """Reused/recomputed row counters of this process for monitoring."""
+        with self.lock:
+            rows = self.reused + self.recomputed
+            return {
+                'rows_reused': self.reused,
+                'rows_recomputed': self.recomputed,
+                'reuse_rate': round(self.reused / rows, 4) if rows else 0.0,
+                'backend': self.db_path or None
+            }
+
+score_index = ScoreIndex(SCORE_INDEX_DB)
+
+def row_fingerprints(X):
+    """64-bit hash of every row of a feature matrix, canonicalised like manual_cache_key."""
+    canonical = np.ascontiguousarray(X, dtype=np.float64) + 0.0  # Folds -0.0 into 0.0
+    canonical[np.isnan(canonical)] = np.nan  # One NaN bit pattern
+    hashes = pd.util.hash_pandas_object(pd.DataFrame(canonical, copy=False), index=False)
+    return hashes.to_numpy().view(np.int64)  # sqlite integers are signed
+
+def index_keys(df, mission):
+    """Score index key of every row: its first populated identifier column and value, or ''."""
+    keys = np.full(len(df), '', dtype=object)
+    for id_col in MISSION_CONFIGS[mission]['identifier_columns']:
+        if id_col in df.columns:
+            column = df[id_col]
+            if not pd.api.types.is_string_dtype(column):
+                column = column.astype(object).where(column.notna(), '').astype(str)
+            values = column.to_numpy(dtype=object, na_value='')
+            fill = (keys == '') & (values != '')
+            keys[fill] = id_col + '=' + values[fill]
+    return keys
+
+def file_sha256(path):
+    """SHA-256 hex digest of a file, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_artifact(path):
+    """Load a joblib artifact, recording its content hash for the pipeline version."""
+    artifact_hashes[path] = file_sha256(path)
+    return joblib.load(path)
+
+def process_memory_mb():
+    """Resident and file-backed shared memory of this process in MB (Linux /proc; zeros elsewhere)."""
     try:
-        if mission == 'kepler':
-            # Load Kepler model from local file
-            model_path = config['model_path']
-            print(f"Loading {mission} model from {model_path}...")
-            models[mission] = joblib.load(model_path)
-            
-            # Set legacy model variable for backward compatibility
-            model = models[mission]
+        with open('/proc/self/statm') as f:
+            _, resident, shared = (int(v) for v in f.read().split()[:3])
+    except OSError:
+        return 0.0, 0.0
+    page_mb = os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    return resident * page_mb, shared * page_mb
 
-        elif mission == 'k2':
-            # Load K2 model and scaler from local files
-            model_path = config['model_path']
-            scaler_path = config['scaler_path']
-            
-            print(f"Loading {mission} model from {model_path}...")
-            models[mission] = joblib.load(model_path)
-            
-            print(f"Loading {mission} scaler from {scaler_path}...")
-            scalers[mission] = joblib.load(scaler_path)
+def warm_up_mission(mission):
+    """Load a mission and push a one-row catalog through parsing, preprocessing and prediction.
+
+    The first pass through each stage pays one-off costs (parser set-up, first touches of
+    the model's arrays), so warming up keeps them off the first real request.
+    """
+    if not load_model(mission):
+        return False
+    try:
+        pipeline = pipelines[mission]
+        sample = pd.DataFrame([pipeline.default_values], columns=pipeline.features).to_csv(index=False)
+        pipeline.predict(pipeline.transform(read_catalog(io.BytesIO(sample.encode()), mission)))
+        model_states[mission]['warmed_up'] = True
+    except Exception as e:
+        print(f"Warning: {mission} warm-up inference failed: {str(e)}")
+    return True
+
+def preload_models():
+    """Load and warm up every mission in parallel and report cold-start time and memory.
+
+    Run in the gunicorn master before workers fork (see gunicorn.conf.py) so all workers
+    share the loaded models copy-on-write instead of each loading its own copy.
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(MISSION_CONFIGS), thread_name_prefix='warm-up') as executor:
+        list(executor.map(warm_up_mission, MISSION_CONFIGS))
+    elapsed = time.perf_counter() - start
+    rss, shared = process_memory_mb()
+    timings = ', '.join(f"{m}={t:.2f}s" for m, t in load_times.items())
+    print(f"Models preloaded in {elapsed:.2f}s ({timings}); RSS {rss:.1f} MB, shared {shared:.1f} MB")
+
+    # Keep the garbage collector from touching (and so copying) the preloaded objects after fork
+    gc.freeze()
+    return elapsed
+
+# Background warm-up of this process, started by start_warmup()
+warmup_thread = None
+warmup_lock = threading.Lock()
+
+def start_warmup():
+    """Run preload_models on a background thread, so the server takes requests (and answers /readyz) meanwhile."""
+    global warmup_thread
+    with warmup_lock:
+        if warmup_thread is None:
+            warmup_thread = threading.Thread(target=preload_models, name='warm-up', daemon=True)
+            warmup_thread.start()
+    return warmup_thread
+
+def process_pool(max_workers, initializer):
+    """ProcessPoolExecutor whose workers start from a clean forkserver (spawn where it is unavailable).
+
+    Pools are created lazily in web workers that already run threads (request threads, the
+    micro-batcher, the warm-up). A plain fork could copy a lock one of them holds, such as
+    metrics.lock, and the child would hang the first time it took that lock.
+    """
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return ProcessPoolExecutor(max_workers=max_workers, initializer=initializer,
+                               mp_context=multiprocessing.get_context(method))
+
+# Shard executors of this process, keyed by (backend, workers)
+shard_executors = {}
+shard_lock = threading.Lock()
 
-        elif mission == 'tess':
-            # Load TESS model, scaler, and label encoder from local files
+def get_shard_executor(backend, n_workers):
+    """Thread or process pool used to score row shards, created lazily per process."""
+    key = (backend, n_workers)
+    with shard_lock:
+        executor, pid = shard_executors.get(key, (None, None))
+        if executor is None or pid != os.getpid():
+            if backend == 'process':
+                # Pool processes start without the parent's models, so each loads them once
+                executor = process_pool(n_workers, preload_models)
+            else:
+                # Tree traversal in scikit-learn releases the GIL, so threads scale for large shards
+                executor = ThreadPoolExecutor(max_workers=n_workers, thread_name_prefix='shard')
+            shard_executors[key] = (executor, os.getpid())
+    return executor
+
+def predict_shard(mission, X):
+    """Score one row shard in a pool worker."""
+    return pipelines[mission].predict(X)
+
+def predict_matrix(mission, X, shards=None):
+    """pipeline.predict, optionally split into contiguous row shards scored in parallel.
+
+    Shards are concatenated back in their original order, so row i of the result is
+    always row i of X.
+    """
+    shards = SCORING_SHARDS if shards is None else shards
+    if shards <= 1 or len(X) < SHARD_MIN_ROWS:
+        return pipelines[mission].predict(X)
+
+    bounds = np.linspace(0, len(X), shards + 1).astype(int)
+    parts = [X[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+    executor = get_shard_executor(SCORING_BACKEND, shards)
+    results = list(executor.map(predict_shard, [mission] * len(parts), parts))
+    labels, confidences, probabilities = zip(*results)
+    return np.concatenate(labels), np.concatenate(confidences), np.vstack(probabilities)
+
+sklearn_import_lock = threading.Lock()
+
+def import_sklearn():
+    """Import the scikit-learn estimators the pickled models are built from, one thread at a time.
+
+    Unpickling models on several threads would otherwise import scikit-learn's modules
+    concurrently, which can trip Python's import deadlock detection.
+    """
+    with sklearn_import_lock:
+        # Imported for its side effect; also pulls in the tree, linear model and preprocessing modules
+        import sklearn.ensemble  # noqa: F401
+
+def load_model(mission='kepler'):
+    """Load model, scaler and label encoder for the specified mission and build its pipeline."""
+    global models, scalers, label_encoders, pipelines, model
+
+    if pipelines.get(mission) is not None:
+        return True
+
+    # Requests that arrive during a load (e.g. the warm-up's) wait for it instead of loading again
+    with model_load_locks[mission]:
+        if pipelines.get(mission) is not None:
+            return True
+        model_states[mission] = {'state': 'loading'}
+
+        config = MISSION_CONFIGS[mission]
+
+        try:
+            start = time.perf_counter()
+            import_sklearn()
             model_path = config['model_path']
-            scaler_path = config['scaler_path']
-            label_encoder_path = config['label_encoder_path']
-            
             print(f"Loading {mission} model from {model_path}...")
-            models[mission] = joblib.load(model_path)
-            
-            print(f"Loading {mission} scaler from {scaler_path}...")
-            scalers[mission] = joblib.load(scaler_path)
-            
-            print(f"Loading {mission} label encoder from {label_encoder_path}...")
-            label_encoders[mission] = joblib.load(label_encoder_path)
+            models[mission] = load_artifact(model_path)
 
-        print(f"{mission.capitalize()} model loaded successfully!")
-        return True
+            if 'scaler_path' in config:
+                print(f"Loading {mission} scaler from {config['scaler_path']}...")
+                scalers[mission] = load_artifact(config['scaler_path'])
 
-    except Exception as e:
-        print(f"Error loading {mission} model: {str(e)}")
-        models[mission] = None
-        if mission in scalers:
-            scalers[mission] = None
-        if mission in label_encoders:
-            label_encoders[mission] = None
-        return False
+            if 'label_encoder_path' in config:
+                print(f"Loading {mission} label encoder from {config['label_encoder_path']}...")
+                label_encoders[mission] = load_artifact(config['label_encoder_path'])
+
+            artifact_paths = [config[key] for key in ('model_path', 'scaler_path', 'label_encoder_path') if key in config]
+
+            # Training-set imputation profile; without one, missing values get per-upload medians
+            imputation = None
+            if os.path.exists(config['imputation_path']):
+                print(f"Loading {mission} imputation profile from {config['imputation_path']}...")
+                imputation = load_artifact(config['imputation_path'])
+                artifact_paths.append(config['imputation_path'])
+            else:
+                print(f"Warning: no {mission} imputation profile, missing values are filled with per-upload medians "
+                      f"(build one with imputation_profiles.py)")
+
+            version = hashlib.sha256(''.join(artifact_hashes[p] for p in artifact_paths).encode()).hexdigest()[:16]
+            pipeline = MissionPipeline(
+                mission, models[mission], scalers.get(mission), label_encoders.get(mission), version=version,
+                imputation=imputation
+            )
+
+            # Single-pass inference relies on argmax(predict_proba) matching predict(); check on a probe batch
+            pipeline.check_consistency(pipeline.probe_batch())
+            pipelines[mission] = pipeline
+
+            if mission == 'kepler':
+                # Set legacy model variable for backward compatibility
+                model = models[mission]
+
+            load_times[mission] = time.perf_counter() - start
+            model_states[mission] = {'state': 'loaded'}
+            metrics.observe('exofinder_model_load_seconds', load_times[mission], mission=mission)
+            print(f"{mission.capitalize()} model loaded successfully in {load_times[mission]:.2f}s!")
+            return True
+
+        except Exception as e:
+            print(f"Error loading {mission} model: {str(e)}")
+            model_states[mission] = {'state': 'failed', 'error': str(e)}
+            models[mission] = None
+            pipelines.pop(mission, None)
+            if mission in scalers:
+                scalers[mission] = None
+            if mission in label_encoders:
+                label_encoders[mission] = None
+            return False
 
 def preprocess_data(df, mission='kepler', selected_features=None):
     """Preprocess input data for the specified mission model prediction."""
-    config = MISSION_CONFIGS[mission]
-    required_features = config['required_features']
-    
-    # IMPORTANT: Always use ALL required features for model compatibility
     # selected_features is only for UI display purposes, not for model input
-    
-    # Keep only required features that exist in the dataframe
-    available_features = [col for col in required_features if col in df.columns]
-    
-    if len(available_features) == 0:
+    if not load_model(mission):
+        raise ValueError(f"{mission.capitalize()} model is not available")
+    pipeline = pipelines[mission]
+    return pd.DataFrame(pipeline.transform(df), columns=pipeline.features, index=df.index)
+
+def coerce_numeric(series):
+    """Vectorized numeric coercion for a raw CSV column.
+
+    Parses decimal and scientific notation strings (surrounding whitespace allowed)
+    in a single pass; anything unparseable becomes NaN. Replaces the per-cell
+    convert_scientific_notation round trip (kept in benchmark.py for comparison),
+    which also truncated values below 1e-10.
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series
+    return pd.to_numeric(series, errors='coerce')
+
+def route_missions(mission):
+    """Missions whose models score an upload for the requested mission ('auto' uses all of them)."""
+    return list(MISSION_CONFIGS) if mission == AUTO_MISSION else [mission]
+
+def catalog_columns(mission):
+    """Required feature and identifier columns read from an upload for the requested mission."""
+    missions = route_missions(mission)
+    features = list(dict.fromkeys(f for m in missions for f in MISSION_CONFIGS[m]['required_features']))
+    identifiers = list(dict.fromkeys(c for m in missions for c in MISSION_CONFIGS[m]['identifier_columns']))
+    return features, identifiers
+
+def allowed_upload(filename):
+    """True if an uploaded file name has one of the supported catalog extensions."""
+    return filename.lower().endswith(INPUT_EXTENSIONS)
+
+def detect_input_format(file):
+    """Return (format, compression) of an upload from its leading bytes, leaving the position unchanged."""
+    start = file.tell()
+    head = file.read(8)
+    file.seek(start)
+    for magic, input_format, compression in INPUT_SIGNATURES:
+        if head.startswith(magic):
+            return input_format, compression
+    return 'csv', None
+
+def read_catalog(file, mission, chunksize=None):
+    """Read the mission's columns from an uploaded catalog in any supported format.
+
+    CSV (optionally gzip or zstd compressed), Parquet, Feather and Arrow IPC are
+    told apart by their leading bytes. Returns a dataframe, or an iterator of
+    dataframes of at most chunksize rows if chunksize is given.
+    """
+    input_format, compression = detect_input_format(file)
+    try:
+        if input_format == 'csv':
+            return read_catalog_csv(file, mission, chunksize, compression)
+        return read_catalog_arrow(file, mission, input_format, chunksize)
+    except ImportError as e:
+        raise ValueError(f"{compression or input_format} input is not supported on this server: {str(e)}")
+
+def read_catalog_arrow(file, mission, input_format, chunksize=None):
+    """Read the mission's columns from a Parquet, Feather or Arrow IPC upload.
+
+    Only the needed columns are decoded, and numeric columns are handed to pandas
+    without copying where Arrow allows it. Requires pyarrow.
+    """
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+
+    features, identifiers = catalog_columns(mission)
+    wanted = set(features) | set(identifiers)
+    to_pandas_options = {'split_blocks': True, 'strings_to_categorical': True}
+
+    if input_format == 'parquet':
+        parquet_file = pq.ParquetFile(file)
+        columns = [c for c in parquet_file.schema_arrow.names if c in wanted]
+        batches = parquet_file.iter_batches(batch_size=chunksize or CSV_CHUNK_SIZE, columns=columns)
+    else:
+        reader = pyarrow.ipc.open_file(file) if input_format == 'arrow' else pyarrow.ipc.open_stream(file)
+        columns = [c for c in reader.schema.names if c in wanted]
+        if input_format == 'arrow':
+            batches = (reader.get_batch(i).select(columns) for i in range(reader.num_record_batches))
+        else:
+            batches = (batch.select(columns) for batch in reader)
+
+    if chunksize is None:
+        batches = list(batches)
+        table = pyarrow.Table.from_batches(batches) if batches else pyarrow.table({})
+        df = table.to_pandas(self_destruct=True, **to_pandas_options)
+        return finish_catalog_frame(df, mission)
+
+    def chunks():
+        # Regroup record batches (any size in IPC files) into chunks of exactly chunksize rows,
+        # so per-chunk imputation matches the CSV reader; slicing is zero-copy
+        pending, pending_rows = [], 0
+        for batch in batches:
+            offset = 0
+            while offset < batch.num_rows:
+                piece = batch.slice(offset, chunksize - pending_rows)
+                pending.append(piece)
+                pending_rows += piece.num_rows
+                offset += piece.num_rows
+                if pending_rows == chunksize:
+                    yield finish_catalog_frame(pyarrow.Table.from_batches(pending).to_pandas(**to_pandas_options), mission)
+                    pending, pending_rows = [], 0
+        if pending:
+            yield finish_catalog_frame(pyarrow.Table.from_batches(pending).to_pandas(**to_pandas_options), mission)
+    return chunks()
+
+def read_catalog_csv(file, mission, chunksize=None, compression=None):
+    """Read only the columns a mission uses from a catalog CSV, in compact dtypes.
+
+    Archive exports carry hundreds of columns; everything except the mission's
+    required features and identifier columns is skipped by the parser. Features
+    are parsed straight to the pipeline's input dtype and identifiers to
+    categoricals. If a feature column holds unparseable text the file is read
+    again with inferred feature dtypes so coerce_numeric can clean it up.
+    Chunked reads (chunksize) prune columns but always infer feature dtypes,
+    since a reader cannot be restarted part way through.
+    """
+    features, identifiers = catalog_columns(mission)
+    wanted = set(features) | set(identifiers)
+    id_dtypes = {id_col: 'category' for id_col in identifiers}
+    read = lambda dtype: pd.read_csv(file, comment='#', usecols=lambda column: column in wanted,
+                                     dtype=dtype, chunksize=chunksize, compression=compression)
+    if chunksize is not None:
+        return (finish_catalog_frame(chunk, mission) for chunk in read(id_dtypes))
+
+    # Shared feature columns of a merged catalog feed scaled models, so they stay float64
+    feature_dtype = pipelines[mission].input_dtype if pipelines.get(mission) else np.float64
+    start = file.tell()
+    try:
+        df = read({**id_dtypes, **{feature: feature_dtype for feature in features}})
+    except ValueError:
+        file.seek(start)
+        df = read(id_dtypes)
+    return finish_catalog_frame(df, mission)
+
+def finish_catalog_frame(df, mission):
+    """Validate a pruned catalog frame and give numeric identifiers numeric categories.
+
+    Pruning drops the row count along with the columns, so a file without any of
+    the mission's columns is rejected here. Categorical identifiers whose values
+    are all numbers (such as TESS TOI numbers) keep serialising as numbers.
+    """
+    if len(df.columns) == 0:
         raise ValueError("No required features found in the data")
+    for id_col in catalog_columns(mission)[1]:
+        if id_col in df.columns and isinstance(df[id_col].dtype, pd.CategoricalDtype):
+            categories = pd.to_numeric(df[id_col].cat.categories, errors='coerce')
+            if len(categories) and not categories.isna().any():
+                df[id_col] = df[id_col].cat.rename_categories(categories)
+    return df
+
+def score_dataframe(df, mission='kepler', selected_features=None, row_offset=0, shards=None):
+    """Preprocess, predict and label a dataframe of candidates for the specified mission.
+
+    row_offset shifts the RowID column so chunks of a larger file keep their original numbering.
+    shards overrides SCORING_SHARDS for parallel scoring of this dataframe.
+    """
+    # Get mission configuration and inference pipeline
+    config = MISSION_CONFIGS[mission]
+    pipeline = pipelines[mission]
+
+    # Preserve identifier columns if they exist
+    identifier_columns = {}
+    for id_col in config['identifier_columns']:
+        if id_col in df.columns:
+            # Replace NaN values with empty strings for JSON compatibility
+            identifier_columns[id_col] = df[id_col].astype(object).fillna('').tolist()
+
+    # Preprocess data for the selected mission (selected_features is for UI display only)
+    with timed_stage('preprocess', mission):
+        X = pipeline.prepare(df)
+    n_rows = len(X)
+    class_index = np.zeros(n_rows, dtype=np.intp)
+    confidence_scores = np.zeros(n_rows)
+
+    # Rows whose identifier and model input are unchanged since they were last scored reuse that prediction
+    reused = np.zeros(n_rows, dtype=bool)
+    if score_index.db_path:
+        with timed_stage('index_lookup', mission):
+            keys = index_keys(df, mission)
+            fingerprints = row_fingerprints(X)
+            reused, class_index, confidence_scores = score_index.lookup(mission, pipeline.version, keys, fingerprints)
+    recompute = np.flatnonzero(~reused)
+
+    if len(recompute):
+        with timed_stage('scale', mission):
+            X = pipeline.scale(X if len(recompute) == n_rows else X[recompute])
+
+        # Make predictions using the mission-specific model
+        try:
+            with timed_stage('predict', mission):
+                _, confidences, probabilities = predict_matrix(mission, X, shards)
+        except ValueError as e:
+            raise RuntimeError(f'Prediction error: {str(e)}')
+        class_index[recompute] = np.argmax(probabilities, axis=1)
+        confidence_scores[recompute] = confidences
+
+        if score_index.db_path:
+            with timed_stage('index_store', mission):
+                stored = recompute[keys[recompute] != '']
+                score_index.store(mission, pipeline.version, keys[stored], fingerprints[stored],
+                                  class_index[stored], confidence_scores[stored])
+    display_predictions = pipeline.class_labels[class_index]
+    count_rows(mission, n_rows)
+    if reused.any():
+        metrics.inc('exofinder_rows_reused_total', int(reused.sum()), endpoint=current_endpoint(), mission=mission)
+    score_index.record(int(reused.sum()), len(recompute))
+
+    # Create results dataframe
+    results_data = {
+        'RowID': range(row_offset + 1, row_offset + len(display_predictions) + 1),
+        'Predicted_Class': display_predictions,
+        'Confidence': confidence_scores.round(4)
+    }
+
+    # Add identifier columns to results if they exist
+    for id_col, values in identifier_columns.items():
+        results_data[id_col] = values
+
+    results_df = pd.DataFrame(results_data)
+    results_df.attrs.update(rows_reused=int(reused.sum()), rows_recomputed=len(recompute))
     
-    # Select only available features
-    processed_df = df[available_features].copy()
-    
-    # Convert scientific notation to decimal format
-    for col in processed_df.columns:
-        if processed_df[col].dtype == 'object':
-            # Convert string columns that might contain scientific notation
-            processed_df[col] = processed_df[col].astype(str).apply(convert_scientific_notation)
-        processed_df[col] = pd.to_numeric(processed_df[col], errors='coerce')
-    
-    # Handle missing features intelligently to preserve accuracy
-    missing_features = []
-    all_required_features = config['required_features']  # Keep original list for model compatibility
-    
-    for feature in all_required_features:
-        if feature not in processed_df.columns:
-            missing_features.append(feature)
-            # For truly missing features (not in original data), use defaults
-            if feature == 'pl_orbeccen':  # Orbital eccentricity
-                processed_df[feature] = 0.1  # Typical low eccentricity for planets
-            elif feature == 'pl_insol':  # Insolation flux
-                processed_df[feature] = 1.0  # Earth-like insolation as default
+    return results_df
+
+def detect_missions(df):
+    """Mission of every row of a merged catalog, from which mission's columns the row populates.
+
+    A row scores the share of a mission's own features (those no other mission uses,
+    such as koi_* for Kepler or st_tmag for TESS) it fills. The share of all the
+    mission's required features (weight 0.01) and having one of its identifiers
+    (weight 0.001) only break ties, so a TESS row that also carries pl_name is not
+    sent to K2. MISSION_CONFIGS order breaks any remaining tie; rows with nothing
+    populated follow the mission whose columns cover the file best.
+    """
+    names = list(MISSION_CONFIGS)
+    scores = np.zeros((len(df), len(names)))
+    for j, mission in enumerate(names):
+        config = MISSION_CONFIGS[mission]
+        shared = {f for other in names if other != mission for f in MISSION_CONFIGS[other]['required_features']}
+        own = [f for f in config['required_features'] if f not in shared]
+        filled = df.reindex(columns=config['required_features']).notna()
+        if own:
+            scores[:, j] = filled[own].to_numpy().sum(axis=1) / len(own)
+        scores[:, j] += 0.01 * filled.to_numpy().sum(axis=1) / len(config['required_features'])
+        identifiers = [c for c in config['identifier_columns'] if c in df.columns]
+        if identifiers:
+            populated = df[identifiers].astype(object).fillna('').to_numpy() != ''
+            scores[:, j] += 0.001 * populated.any(axis=1)
+    best = np.argmax(scores, axis=1)
+    empty = scores.max(axis=1) == 0
+    if empty.any():
+        best[empty] = np.argmax(scores.sum(axis=0))
+    return np.array(names, dtype=object)[best]
+
+def score_mixed_dataframe(df, selected_features=None, row_offset=0, shards=None):
+    """Score a merged multi-mission catalog: route rows, score each mission's rows in one batch.
+
+    Results come back in input order with a Mission column and every mission's
+    identifier columns (empty where a row has none).
+    """
+    row_missions = detect_missions(df)
+    n_rows = len(df)
+    predictions = np.empty(n_rows, dtype=object)
+    confidences = np.zeros(n_rows)
+    counts = {'rows_reused': 0, 'rows_recomputed': 0}
+    for mission in MISSION_CONFIGS:
+        rows = np.flatnonzero(row_missions == mission)
+        if len(rows) == 0:
+            continue
+        group = score_dataframe(df.iloc[rows], mission, selected_features, shards=shards)
+        predictions[rows] = group['Predicted_Class'].to_numpy()
+        confidences[rows] = group['Confidence'].to_numpy()
+        for name in counts:
+            counts[name] += group.attrs[name]
+
+    results_data = {
+        'RowID': range(row_offset + 1, row_offset + n_rows + 1),
+        'Mission': row_missions,
+        'Predicted_Class': predictions,
+        'Confidence': confidences
+    }
+    for id_col in catalog_columns(AUTO_MISSION)[1]:
+        if id_col in df.columns:
+            results_data[id_col] = df[id_col].astype(object).fillna('').tolist()
+    results_df = pd.DataFrame(results_data)
+    results_df.attrs.update(counts)
+    return results_df
+
+def score_catalog(df, mission, selected_features=None, row_offset=0, shards=None):
+    """score_dataframe for one mission, or per-row mission routing for 'auto'."""
+    if mission == AUTO_MISSION:
+        return score_mixed_dataframe(df, selected_features, row_offset, shards)
+    return score_dataframe(df, mission, selected_features, row_offset, shards)
+
+def columnar_json(results_df, **fields):
+    """JSON body with one array per results column under 'columns', plus the given top-level fields.
+
+    Skips the per-row dicts of to_dict('records'). With orjson installed, numeric
+    columns are encoded directly from their numpy buffers.
+    """
+    columns = {}
+    for name, column in results_df.items():
+        values = column.to_numpy()
+        # orjson reads numeric arrays natively; everything else goes through a plain list
+        columns[name] = values if orjson is not None and values.dtype.kind in 'iuf' else values.tolist()
+    body = {**fields, 'columns': columns}
+    if orjson is not None:
+        return orjson.dumps(body, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(body).encode()
+
+def stream_predictions(file, mission, selected_features=None, stream_format='ndjson', chunk_size=CSV_CHUNK_SIZE):
+    """Score an uploaded catalog in fixed-size row chunks, yielding NDJSON lines or CSV text per chunk.
+
+    Only one chunk is held in memory at a time. Missions without an imputation profile
+    fill missing values with the median of each chunk rather than of the whole file.
+    """
+    total_rows = 0
+    counts = {'rows_reused': 0, 'rows_recomputed': 0}
+    try:
+        # Read CSV file in chunks (ignore comment lines starting with #)
+        for chunk in read_catalog(file, mission, chunksize=chunk_size):
+            results_df = score_catalog(chunk, mission, selected_features, row_offset=total_rows)
+            for name in counts:
+                counts[name] += results_df.attrs[name]
+            if stream_format == 'csv':
+                yield results_df.to_csv(index=False, header=(total_rows == 0))
             else:
-                # For any other missing features, use median of existing data
-                processed_df[feature] = 0
-    
-    # IMPORTANT: Do NOT modify values for unselected features
-    # The model needs original values to make accurate predictions
-    # Feature selection is only for UI display purposes
-    
-    # Log missing features for debugging
-    if missing_features:
-        print(f"Warning: Missing features filled with defaults: {missing_features}")
-    
-    # Reorder columns to match model expectations (use all required features)
-    processed_df = processed_df[all_required_features]
+                yield results_df.to_json(orient='records', lines=True).rstrip('\n') + '\n'
+            total_rows += len(results_df)
+    except Exception as e:
+        print(f"Streaming prediction failed after {total_rows} rows: {str(e)}")
+        if stream_format == 'csv':
+            # Comment lines are skipped when the CSV is read back
+            yield f"# Error processing file: {str(e)}\n"
+        else:
+            yield json.dumps({'error': f'Error processing file: {str(e)}', 'rows_processed': total_rows}) + '\n'
+        return
+    finally:
+        file.close()
 
-    # Handle missing values by filling with median
-    processed_df = processed_df.fillna(processed_df.median())
-    
-    # Apply scaling for K2 and TESS missions
-    if mission in ['k2', 'tess'] and mission in scalers and scalers[mission] is not None:
-        print(f"Applying StandardScaler for {mission} mission...")
-        processed_df_scaled = scalers[mission].transform(processed_df)
-        processed_df = pd.DataFrame(processed_df_scaled, columns=processed_df.columns, index=processed_df.index)
-    
-    return processed_df
+    if stream_format == 'ndjson':
+        # Final line lets clients tell a complete stream from a truncated one
+        yield json.dumps({'success': True, 'total_rows': total_rows, 'mission': mission, **counts}) + '\n'
+
+def job_status_path(job_id):
+    return os.path.join(JOB_DIR, f"{job_id}.json")
+
+def read_job_status(job_id):
+    """Return the status dict of a job, or None if it is unknown."""
+    if not job_id or not all(c in '0123456789abcdef' for c in job_id):
+        return None
+    try:
+        with open(job_status_path(job_id)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_job_status(job_id, **fields):
+    """Merge fields into a job's status file (atomically, so any web worker can poll it)."""
+    status = read_job_status(job_id) or {'job_id': job_id}
+    status.update(fields, updated=time.time())
+    tmp_path = f"{job_status_path(job_id)}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(status, f)
+    os.replace(tmp_path, job_status_path(job_id))
+    return status
+
+def purge_expired_jobs():
+    """Delete status files of jobs that finished longer ago than their results are kept."""
+    cutoff = time.time() - RESULT_STORE_TTL
+    for entry in os.scandir(JOB_DIR):
+        try:
+            if entry.name.endswith('.json') and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+def init_job_worker():
+    """Process pool initializer: lower priority and make sure every mission model is loaded."""
+    if JOB_WORKER_NICE and hasattr(os, 'nice'):
+        os.nice(JOB_WORKER_NICE)
+    # Pool processes start without the parent's models, so each loads them once
+    for mission in MISSION_CONFIGS:
+        load_model(mission)
+
+def remove_job_upload(upload_path):
+    try:
+        os.remove(upload_path)
+    except OSError:
+        pass
 
-def convert_scientific_notation(value):
-    """Convert scientific notation strings to decimal format"""
+def run_scoring_job(job_id, upload_path, mission, chunk_size=CSV_CHUNK_SIZE):
+    """Score an uploaded catalog in a worker process, reporting progress to the job's status file."""
+    start = time.time()
+    write_job_status(job_id, status='running', started=start)
     try:
-        # Handle string values that might be in scientific notation
-        if isinstance(value, str):
-            value = value.strip()
-            # Check if it contains 'E' or 'e' (scientific notation)
-            if 'E' in value.upper():
-                # Convert to float first, then back to string to get decimal format
-                float_val = float(value)
-                # Format with enough precision to avoid losing data
-                return f"{float_val:.10f}".rstrip('0').rstrip('.')
-        return value
-    except (ValueError, TypeError):
-        return value
+        upload_size = os.path.getsize(upload_path) or 1
+        frames = []
+        total_rows = 0
+        counts = {'rows_reused': 0, 'rows_recomputed': 0}
+        with open(upload_path, 'rb') as f:
+            for chunk in read_catalog(f, mission, chunksize=chunk_size):
+                frames.append(score_catalog(chunk, mission, row_offset=total_rows))
+                for name in counts:
+                    counts[name] += frames[-1].attrs[name]
+                total_rows += len(chunk)
+                write_job_status(job_id, rows_processed=total_rows,
+                                 progress=round(min(f.tell() / upload_size, 1.0), 3))
+        if total_rows == 0:
+            raise ValueError('CSV file is empty')
+        result_store.save(pd.concat(frames, ignore_index=True), mission, job_id)
+        duration = time.time() - start
+        write_job_status(job_id, status='done', progress=1.0, result_id=job_id, total_rows=total_rows,
+                         finished=time.time(), duration=round(duration, 3), **counts)
+    except Exception as e:
+        duration = time.time() - start
+        write_job_status(job_id, status='failed', error=f'Error processing file: {str(e)}',
+                         finished=time.time(), duration=round(duration, 3))
+    finally:
+        remove_job_upload(upload_path)
+    return duration
+
+# Job process pool and counters of this web worker process
+job_executor = None
+job_executor_pid = None
+job_executor_started = None
+job_lock = threading.Lock()
+job_counters = {'submitted': 0, 'completed': 0, 'rejected': 0, 'pending': 0, 'busy_seconds': 0.0}
+job_durations = []  # Most recent job durations in seconds
+
+def get_job_executor():
+    """Process pool for scoring jobs, created lazily per web worker process."""
+    global job_executor, job_executor_pid, job_executor_started
+    if job_executor is None or job_executor_pid != os.getpid():
+        job_executor = process_pool(JOB_WORKERS, init_job_worker)
+        job_executor_pid = os.getpid()
+        job_executor_started = time.time()
+    return job_executor
+
+def discard_job_executor(executor):
+    """Drop a broken job pool (a worker died, e.g. out of memory) so the next submit starts a new one.
+
+    Call with job_lock held. Only the current pool is dropped, so a late report about an
+    already replaced pool does not discard its replacement.
+    """
+    global job_executor
+    if executor is job_executor:
+        job_executor = None
+        executor.shutdown(wait=False)
+
+def _job_finished(job_id, upload_path, executor, future):
+    error = future.exception()
+    with job_lock:
+        job_counters['pending'] -= 1
+        job_counters['completed'] += 1
+        if error is None:
+            duration = future.result()
+            job_counters['busy_seconds'] += duration
+            job_durations.append(duration)
+            del job_durations[:-1000]
+        elif isinstance(error, BrokenProcessPool):
+            discard_job_executor(executor)
+    if error is not None:
+        # run_scoring_job reports its own errors, so the worker died before it could
+        write_job_status(job_id, status='failed', error=f'Job worker failed: {str(error) or type(error).__name__}',
+                         finished=time.time())
+        remove_job_upload(upload_path)
+
+def submit_scoring_job(file, mission):
+    """Save an upload and queue it for scoring; returns the job ID, or None if the queue is full."""
+    with job_lock:
+        if job_counters['pending'] >= JOB_MAX_QUEUED:
+            job_counters['rejected'] += 1
+            return None
+        job_counters['pending'] += 1
+        job_counters['submitted'] += 1
+    job_id = uuid.uuid4().hex
+    upload_path = os.path.join(JOB_DIR, f"{job_id}.upload")
+    executor = None
+    try:
+        os.makedirs(JOB_DIR, exist_ok=True)
+        purge_expired_jobs()
+        file.save(upload_path)
+        write_job_status(job_id, status='queued', mission=mission, submitted=time.time(), rows_processed=0, progress=0.0)
+        with job_lock:
+            executor = get_job_executor()
+        future = executor.submit(run_scoring_job, job_id, upload_path, mission)
+    except Exception as e:
+        # The job never reached the pool: give its queue slot back and clean up after it
+        with job_lock:
+            job_counters['pending'] -= 1
+            if isinstance(e, BrokenProcessPool):
+                discard_job_executor(executor)
+        remove_job_upload(upload_path)
+        if os.path.exists(job_status_path(job_id)):
+            write_job_status(job_id, status='failed', error=f'Could not queue the job: {str(e)}', finished=time.time())
+        raise
+    future.add_done_callback(partial(_job_finished, job_id, upload_path, executor))
+    return job_id
+
+def job_stats():
+    """Queue depth, job durations and worker utilisation for this web worker's pool."""
+    with job_lock:
+        durations = sorted(job_durations)
+        uptime = time.time() - job_executor_started if job_executor_started else 0.0
+        return {
+            'queue_depth': max(job_counters['pending'] - JOB_WORKERS, 0),
+            'running': min(job_counters['pending'], JOB_WORKERS),
+            'submitted': job_counters['submitted'],
+            'completed': job_counters['completed'],
+            'rejected': job_counters['rejected'],
+            'workers': JOB_WORKERS,
+            'utilisation': round(job_counters['busy_seconds'] / (uptime * JOB_WORKERS), 4) if uptime else 0.0,
+            'duration_seconds': {
+                'count': len(durations),
+                'mean': round(sum(durations) / len(durations), 3) if durations else 0.0,
+                'p50': round(durations[len(durations) // 2], 3) if durations else 0.0,
+                'p95': round(durations[int(len(durations) * 0.95)], 3) if durations else 0.0,
+                'max': round(durations[-1], 3) if durations else 0.0
+            }
+        }
 
 @app.route('/')
 def index():
@@ -219,15 +1931,18 @@ def index():
 def predict_csv():
     """Handle CSV file upload and prediction"""
     try:
-        if 'file' not in request.files:
+        # Form parsing receives and spools the upload
+        with timed_stage('upload'):
+            files = request.files
+        if 'file' not in files:
             return jsonify({'error': 'No file uploaded'}), 400
         
         file = request.files['file']
         if file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
         
-        if not file.filename.lower().endswith('.csv'):
-            return jsonify({'error': 'Please upload a CSV file'}), 400
+        if not allowed_upload(file.filename):
+            return jsonify({'error': 'Please upload a CSV (optionally .gz or .zst), Parquet, Feather or Arrow file'}), 400
         
         # Get selected mission (default to kepler for backward compatibility)
         mission = request.form.get('mission', 'kepler')
@@ -243,109 +1958,122 @@ def predict_csv():
                 except json.JSONDecodeError:
                     pass  # Use all features if parsing fails
         
-        # Check if mission is supported
-        if mission not in MISSION_CONFIGS:
-            return jsonify({'error': f'Unsupported mission: {mission}'}), 400
+        # Response shape; records stays the default for the web UI
+        response_format = request.args.get('format', 'records')
+        if response_format not in RESPONSE_FORMATS:
+            return jsonify({'error': f'Unsupported response format: {response_format}'}), 400
         
-        # Load model for the selected mission
-        if not load_model(mission):
-            return jsonify({'error': f'{mission.capitalize()} model loading failed'}), 500
+        # Optional number of parallel scoring shards, capped at the number of CPUs
+        shards = request.form.get('shards', type=int)
+        if shards is not None:
+            shards = max(1, min(shards, os.cpu_count() or 1))
         
-        # Check if model was actually loaded
-        if models[mission] is None:
-            return jsonify({'error': f'{mission.capitalize()} model is not available'}), 500
+        # Check if mission is supported ('auto' routes each row of a merged catalog to its mission)
+        if mission != AUTO_MISSION and mission not in MISSION_CONFIGS:
+            return jsonify({'error': f'Unsupported mission: {mission}'}), 400
         
-        # Read CSV file (ignore comment lines starting with #)
-        df = pd.read_csv(file, comment='#')
+        # Load model(s) for the selected mission
+        for model_mission in route_missions(mission):
+            if not load_model(model_mission):
+                return jsonify({'error': f'{model_mission.capitalize()} model loading failed'}), 500
+            
+            # Check if model was actually loaded
+            if models[model_mission] is None:
+                return jsonify({'error': f'{model_mission.capitalize()} model is not available'}), 500
         
-        if df.empty:
-            return jsonify({'error': 'CSV file is empty'}), 400
+        # Streaming mode: score the file chunk by chunk and send results as they are ready
+        stream_format = request.args.get('stream')
+        if stream_format:
+            if stream_format not in STREAM_FORMATS:
+                return jsonify({'error': f'Unsupported stream format: {stream_format}'}), 400
+            chunk_size = request.args.get('chunk_size', CSV_CHUNK_SIZE, type=int)
+            if chunk_size <= 0:
+                return jsonify({'error': 'chunk_size must be a positive integer'}), 400
+            headers = {'X-Accel-Buffering': 'no'}  # Ask reverse proxies not to buffer the stream
+            if stream_format == 'csv':
+                headers['Content-Disposition'] = 'attachment; filename=exoplanet_predictions.csv'
+            # Detach the spooled upload so it outlives the request; the generator closes it
+            upload, file.stream = file.stream, io.BytesIO()
+            g.streamed = True
+            return Response(
+                stream_predictions(upload, mission, selected_features, stream_format, chunk_size),
+                mimetype=STREAM_FORMATS[stream_format],
+                headers=headers
+            )
         
-        # Get mission configuration
-        config = MISSION_CONFIGS[mission]
+        # Answer repeated uploads of the same file from the result cache
+        cache_key = None
+        result_id = None
+        if isinstance(file.stream, HashingStream):
+            versions = '+'.join(pipelines[m].version for m in route_missions(mission))
+            cache_key = f"{file.stream.hexdigest()}-{mission}-{versions}"
+            # Content-addressed result ID, so a cached response still points at its stored results
+            result_id = hashlib.sha256(cache_key.encode()).hexdigest()[:32]
+            cache_key = f"{cache_key}-{response_format}"
+            if result_store.exists(result_id):
+                cached_body = csv_result_cache.get(cache_key, file.stream.size)
+                if cached_body is not None:
+                    return Response(cached_body, mimetype='application/json')
+            else:
+                # A cached body would point at a stored result that is gone, so this is a miss
+                csv_result_cache.record_miss()
         
-        # Preserve identifier columns if they exist
-        identifier_columns = {}
-        for id_col in config['identifier_columns']:
-            if id_col in df.columns:
-                # Replace NaN values with empty strings for JSON compatibility
-                identifier_columns[id_col] = df[id_col].fillna('').tolist()
+        # Read the mission's columns from the uploaded catalog (CSV comment lines starting with # are ignored)
+        with timed_stage('csv_parse', mission):
+            df = read_catalog(file, mission)
         
-        # Preprocess data for the selected mission
-        processed_df = preprocess_data(df, mission, selected_features)
+        if df.empty:
+            return jsonify({'error': 'CSV file is empty'}), 400
         
-        # Make predictions using the mission-specific model
+        # Preprocess, predict and label the uploaded rows
         try:
-            predictions = models[mission].predict(processed_df)
-            probabilities = models[mission].predict_proba(processed_df)
-        except ValueError as e:
-            return jsonify({'error': f'Prediction error: {str(e)}'}), 500
-        
-        # Calculate confidence scores and map predictions based on mission
-        if mission == 'k2':
-            # For K2: class 0=FALSE POSITIVE, class 1=CANDIDATE, class 2=CONFIRMED
-            confidence_scores = []
-            for i, pred in enumerate(predictions):
-                if pred == 0:
-                    confidence_scores.append(probabilities[i][0])  # Probability of class 0 (FALSE POSITIVE)
-                elif pred == 1:
-                    confidence_scores.append(probabilities[i][1])  # Probability of class 1 (CANDIDATE)
-                elif pred == 2:
-                    confidence_scores.append(probabilities[i][2])  # Probability of class 2 (CONFIRMED)
-                else:
-                    confidence_scores.append(np.max(probabilities[i]))  # Fallback
-            confidence_scores = np.array(confidence_scores)
-            
-            # K2 model uses classes 0, 1, and 2: 0=FALSE POSITIVE, 1=CANDIDATE, 2=CONFIRMED
-            class_mapping = {0: 'FALSE POSITIVE', 1: 'CANDIDATE', 2: 'CONFIRMED'}
-            display_predictions = [class_mapping.get(pred, f'UNKNOWN_CLASS_{pred}') for pred in predictions]
-        elif mission == 'tess':
-            # For TESS: use label encoder to decode predictions
-            confidence_scores = np.max(probabilities, axis=1)
-            if mission in label_encoders and label_encoders[mission] is not None:
-                # Decode predictions using label encoder and expand abbreviations
-                raw_predictions = label_encoders[mission].inverse_transform(predictions).tolist()
-                # Map TESS abbreviations to full names
-                tess_class_mapping = {
-                    'APC': 'Astrophysical False Positive - Centroid',
-                    'CP': 'Confirmed Planet',
-                    'FA': 'False Alarm',
-                    'FP': 'False Positive',
-                    'KP': 'Known Planet',
-                    'PC': 'Planet Candidate'
-                }
-                display_predictions = [tess_class_mapping.get(pred, pred) for pred in raw_predictions]
-            else:
-                # Fallback if label encoder is not available
-                display_predictions = [f'CLASS_{pred}' for pred in predictions]
-        else:
-            # For other missions, use max probability
-            confidence_scores = np.max(probabilities, axis=1)
-            # Kepler model already returns proper labels
-            display_predictions = predictions
-        
-        # Create results dataframe
-        results_data = {
-            'RowID': range(1, len(predictions) + 1),
-            'Predicted_Class': display_predictions,
-            'Confidence': confidence_scores.round(4)
-        }
+            results_df = score_catalog(df, mission, selected_features, shards=shards)
+        except RuntimeError as e:
+            return jsonify({'error': str(e)}), 500
         
-        # Add identifier columns to results if they exist
-        for id_col, values in identifier_columns.items():
-            results_data[id_col] = values
+        # Keep the results server-side so downloads don't have to send them back
+        with timed_stage('store_results', mission):
+            result_id = result_store.save(results_df, mission, result_id)
         
-        results_df = pd.DataFrame(results_data)
+        # Rows answered from the score index versus scored again, and rows routed to each mission
+        summary = dict(results_df.attrs)
+        if mission == AUTO_MISSION:
+            summary['mission_counts'] = {m: int(n) for m, n in results_df['Mission'].value_counts().items()}
         
         # Convert to JSON for frontend
-        results = results_df.to_dict('records')
-        
-        return jsonify({
-            'success': True,
-            'results': results,
-            'total_rows': len(results),
-            'mission': mission
-        })
+        with timed_stage('serialize', mission):
+            if response_format == 'summary':
+                response = jsonify({
+                    'success': True,
+                    'total_rows': len(results_df),
+                    'mission': mission,
+                    'result_id': result_id,
+                    'class_counts': {str(c): int(n) for c, n in results_df['Predicted_Class'].value_counts().items()},
+                    **summary
+                })
+            elif response_format == 'columns':
+                response = Response(columnar_json(
+                    results_df,
+                    success=True,
+                    total_rows=len(results_df),
+                    mission=mission,
+                    result_id=result_id,
+                    **summary
+                ), mimetype='application/json')
+            else:
+                results = results_df.to_dict('records')
+                
+                response = jsonify({
+                    'success': True,
+                    'results': results,
+                    'total_rows': len(results),
+                    'mission': mission,
+                    'result_id': result_id,
+                    **summary
+                })
+        if cache_key:
+            csv_result_cache.put(cache_key, response.get_data())
+        return response
         
     except Exception as e:
         return jsonify({'error': f'Error processing file: {str(e)}'}), 500
@@ -394,48 +2122,11 @@ def predict_manual():
             except (ValueError, TypeError):
                 return jsonify({'error': f'Invalid value for {feature}'}), 400
         
-        # Make prediction using the mission-specific model
-        input_array = np.array([input_data])
-        prediction = models[mission].predict(input_array)[0]
-        probabilities = models[mission].predict_proba(input_array)[0]
-        confidence = np.max(probabilities)
-        
-        # Convert numpy types to Python native types for JSON serialization
-        prediction = int(prediction) if hasattr(prediction, 'dtype') else prediction
-        confidence = float(confidence) if hasattr(confidence, 'dtype') else confidence
-        probabilities = [float(prob) if hasattr(prob, 'dtype') else prob for prob in probabilities]
-        
-        # Map prediction to display label based on mission
-        if mission == 'k2':
-            # K2 model uses classes 0, 1, and 2: 0=FALSE POSITIVE, 1=CANDIDATE, 2=CONFIRMED
-            class_mapping = {0: 'FALSE POSITIVE', 1: 'CANDIDATE', 2: 'CONFIRMED'}
-            display_prediction = class_mapping.get(prediction, f'UNKNOWN_CLASS_{prediction}')
-            # Map class names for probability breakdown
-            class_names = ['FALSE POSITIVE', 'CANDIDATE', 'CONFIRMED']
-        elif mission == 'tess':
-            # For TESS: use label encoder to decode predictions
-            if mission in label_encoders and label_encoders[mission] is not None:
-                # Decode prediction using label encoder and expand abbreviation
-                raw_prediction = label_encoders[mission].inverse_transform([prediction])[0]
-                # Map TESS abbreviations to full names
-                tess_class_mapping = {
-                    'APC': 'Astrophysical False Positive - Centroid',
-                    'CP': 'Confirmed Planet',
-                    'FA': 'False Alarm',
-                    'FP': 'False Positive',
-                    'KP': 'Known Planet',
-                    'PC': 'Planet Candidate'
-                }
-                display_prediction = tess_class_mapping.get(raw_prediction, raw_prediction)
-                class_names = [tess_class_mapping.get(cls, cls) for cls in label_encoders[mission].classes_]
-            else:
-                # Fallback if label encoder is not available
-                display_prediction = f'CLASS_{prediction}'
-                class_names = [f'CLASS_{i}' for i in range(len(probabilities))]
-        else:
-            # Kepler model already returns proper labels
-            display_prediction = prediction
-            class_names = models[mission].classes_
+        # Make prediction using the mission-specific pipeline (cached, and batched with concurrent requests)
+        with timed_stage('predict', mission):
+            display_prediction, confidence, probabilities = predict_row_cached(mission, np.array(input_data))
+        count_rows(mission, 1)
+        class_names = pipelines[mission].class_labels
         
         return jsonify({
             'success': True,
@@ -451,48 +2142,198 @@ def predict_manual():
     except Exception as e:
         return jsonify({'error': f'Error making prediction: {str(e)}'}), 500
 
-def is_rate_limited(client_ip):
-    """Check if client is rate limited for chat requests"""
-    now = time.time()
-    # Clean old requests
-    chat_requests[client_ip] = [req_time for req_time in chat_requests[client_ip] 
-                               if now - req_time < CHAT_TIME_WINDOW]
-    
-    # Check if rate limit exceeded
-    if len(chat_requests[client_ip]) >= CHAT_RATE_LIMIT:
-        return True
-    
-    # Add current request
-    chat_requests[client_ip].append(now)
-    return False
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
 
-@app.route('/api/chat', methods=['POST'])
-def chat_with_exoai():
-    """ExoAI Assistant chat endpoint with Gemini API integration"""
-    try:
-        # Rate limiting
-        client_ip = request.remote_addr
-        if is_rate_limited(client_ip):
-            return jsonify({
-                'error': 'Rate limit exceeded. Please wait before sending another message.',
-                'retry_after': 60
-            }), 429
-        
-        data = request.get_json()
-        if not data or 'message' not in data:
-            return jsonify({'error': 'Message is required'}), 400
-        
-        user_message = data['message'].strip()
-        if not user_message or len(user_message) > 500:
-            return jsonify({'error': 'Message must be between 1 and 500 characters'}), 400
-        
-        # Prepare Gemini API request
-        headers = {
-            'Content-Type': 'application/json',
-        }
-        
-        # Space-themed system prompt
-        system_prompt = """You are ExoAI, assistant for ExoFinder - an exoplanet discovery platform by the Aethereologists team.
+@app.after_request
+def record_request_metrics(response):
+    """Count the request, time it, and write its structured timing log line if enabled"""
+    start = g.get('request_start')
+    if start is None:
+        return response
+    duration = time.perf_counter() - start
+    endpoint = request.endpoint or 'unmatched'
+    metrics.inc('exofinder_requests_total', endpoint=endpoint, status=response.status_code)
+    metrics.observe('exofinder_request_seconds', duration, endpoint=endpoint)
+    if TIMING_LOG:
+        print(json.dumps({
+            'ts': round(time.time(), 3),
+            'method': request.method,
+            'path': request.path,
+            'endpoint': endpoint,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 3),
+            'mission': g.get('mission'),
+            'rows': g.get('rows', 0),
+            'stages_ms': {stage: round(seconds * 1000, 3) for stage, seconds in g.get('stage_timings', {}).items()},
+            'streamed': g.get('streamed', False)
+        }), flush=True)
+    return response
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Request, stage, row and model load metrics of this worker in the Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/healthz')
+def healthz():
+    """Liveness: the process is up and serving requests"""
+    return jsonify({'status': 'ok', 'pid': os.getpid(), 'uptime_seconds': round(time.time() - APP_STARTED, 3)})
+
+@app.route('/readyz')
+def readyz():
+    """Readiness: 200 once no mission is still loading and at least one loaded, else 503; per-mission state either way"""
+    # Servers that never started a warm-up (e.g. plain `flask run`) start it on the first probe
+    if any(state['state'] == 'pending' for state in model_states.values()):
+        start_warmup()
+    missions = {}
+    for mission in MISSION_CONFIGS:
+        missions[mission] = dict(model_states[mission])
+        if mission in load_times:
+            missions[mission]['load_seconds'] = round(load_times[mission], 3)
+    states = [state['state'] for state in missions.values()]
+    ready = 'loaded' in states and not any(state in ('pending', 'loading') for state in states)
+    return jsonify({'ready': ready, 'missions': missions}), 200 if ready else 503
+
+@app.route('/api/batching_stats')
+def batching_stats():
+    """Micro-batching queue depth and batch-size histograms per mission"""
+    return jsonify({mission: batcher.stats() for mission, batcher in batchers.items()})
+
+@app.route('/api/cache_stats')
+def cache_stats():
+    """Hit/miss counters and sizes of the prediction and chat answer caches, and score index reuse"""
+    return jsonify({
+        'manual': manual_cache.stats(),
+        'csv': csv_result_cache.stats(),
+        'chat': chat_cache_stats(),
+        'score_index': score_index.stats()
+    })
+
+@app.route('/api/rate_limit_stats')
+def rate_limit_stats():
+    """Allowed/limited counters and tracked client keys of the chat rate limiter"""
+    return jsonify(chat_rate_limiter.stats())
+
+class RateLimiter:
+    """Token bucket rate limiter: `limit` requests per `window` seconds per key, refilled continuously.
+
+    Each check is constant time. A bucket left alone for a whole window is full again,
+    which is the same as having no bucket, so idle keys are simply dropped: in process
+    they are evicted oldest-first from an insertion-ordered dict (capped at max_keys),
+    in the shared sqlite backend they are deleted about once per window.
+    """
+
+    def __init__(self, limit, window, db_path='', max_keys=100000):
+        self.limit = limit
+        self.window = window
+        self.rate = limit / window if window else 0.0
+        self.db_path = db_path
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+        self.db = None
+        self.db_pid = None
+        self.last_purge = 0.0
+        self.allowed = 0
+        self.limited = 0
+
+    def _connection(self):
+        # sqlite connections must not cross fork, so each worker process opens its own
+        if self.db is None or self.db_pid != os.getpid():
+            self.db = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False, isolation_level=None)
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.execute('PRAGMA synchronous=NORMAL')
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+            )
+            self.db.execute('CREATE INDEX IF NOT EXISTS buckets_updated ON buckets (updated)')
+            self.db_pid = os.getpid()
+        return self.db
+
+    def _take(self, tokens, updated, now):
+        """Refill a bucket up to now and try to take one token; returns (tokens left, retry after)."""
+        tokens = min(self.limit, tokens + (now - updated) * self.rate)
+        if tokens >= 1.0:
+            return tokens - 1.0, 0.0
+        return tokens, (1.0 - tokens) / self.rate
+
+    def check(self, key, now=None):
+        """Count a request for key; returns (allowed, seconds until the next request would be allowed)."""
+        if self.limit <= 0:
+            return True, 0.0
+        now = time.time() if now is None else now
+        with self.lock:
+            if self.db_path:
+                tokens, retry_after = self._check_shared(key, now)
+            else:
+                tokens, retry_after = self._check_local(key, now)
+            if retry_after:
+                self.limited += 1
+            else:
+                self.allowed += 1
+        return not retry_after, retry_after
+
+    def _check_local(self, key, now):
+        bucket = self.buckets.pop(key, None)
+        tokens, retry_after = self._take(self.limit if bucket is None else bucket[0],
+                                         now if bucket is None else bucket[1], now)
+        # Re-inserting keeps the dict ordered by last update, so idle buckets sit at the front
+        self.buckets[key] = (tokens, now)
+        while self.buckets:
+            oldest_key, (_, updated) = next(iter(self.buckets.items()))
+            if now - updated < self.window and len(self.buckets) <= self.max_keys:
+                break
+            del self.buckets[oldest_key]
+        return tokens, retry_after
+
+    def _check_shared(self, key, now):
+        try:
+            db = self._connection()
+            # IMMEDIATE takes the write lock up front, so the read-modify-write is atomic across workers
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                row = db.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+                tokens, retry_after = self._take(self.limit if row is None else row[0],
+                                                 now if row is None else row[1], now)
+                db.execute('INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)',
+                           (key, tokens, now))
+                if now - self.last_purge >= self.window:
+                    db.execute('DELETE FROM buckets WHERE updated < ?', (now - self.window,))
+                    self.last_purge = now
+                db.execute('COMMIT')
+            except Exception:
+                db.execute('ROLLBACK')
+                raise
+            return tokens, retry_after
+        except sqlite3.Error as e:
+            # Fail open: a broken limiter backend must not take the chat down
+            print(f"Warning: shared rate limiter failed: {str(e)}")
+            return self.limit, 0.0
+
+    def stats(self):
+        with self.lock:
+            if self.db_path:
+                try:
+                    tracked = self._connection().execute('SELECT COUNT(*) FROM buckets').fetchone()[0]
+                except sqlite3.Error:
+                    tracked = None
+            else:
+                tracked = len(self.buckets)
+            return {
+                'limit': self.limit,
+                'window_seconds': self.window,
+                'tracked_keys': tracked,
+                'allowed': self.allowed,
+                'limited': self.limited,
+                'shared_backend': self.db_path or None
+            }
+
+chat_rate_limiter = RateLimiter(CHAT_RATE_LIMIT, CHAT_TIME_WINDOW, CHAT_RATE_LIMIT_DB, CHAT_RATE_LIMIT_MAX_KEYS)
+
+# Space-themed system prompt, built once rather than per message
+CHAT_SYSTEM_PROMPT = """You are ExoAI, assistant for ExoFinder - an exoplanet discovery platform by the Aethereologists team.
 
         You specialize in:
         - ExoFinder platform features
@@ -512,80 +2353,250 @@ def chat_with_exoai():
         - Use numbered lists for step-by-step explanations
         
         Keep responses engaging, well-formatted, and scientifically accurate. Use emojis occasionally. Always maintain enthusiasm for space exploration!"""
-        
-        payload = {
-            'contents': [
-                {
-                    'parts': [
-                        {'text': f"{system_prompt}\n\nUser: {user_message}"}
-                    ]
-                }
-            ],
-            'generationConfig': {
-                'temperature': 0.7,
-                'topK': 40,
-                'topP': 0.95,
-                'maxOutputTokens': 1000,
+
+CHAT_GENERATION_CONFIG = {
+    'temperature': 0.7,
+    'topK': 40,
+    'topP': 0.95,
+    'maxOutputTokens': 1000,
+}
+
+# Changes whenever the prompt, generation settings or model do, so cached answers never outlive them
+CHAT_PROMPT_VERSION = hashlib.sha256(
+    json.dumps([CHAT_SYSTEM_PROMPT, CHAT_GENERATION_CONFIG, GEMINI_API_URL], sort_keys=True).encode()
+).hexdigest()[:16]
+
+chat_cache = ResultCache(CHAT_CACHE_SIZE, CHAT_CACHE_TTL, CHAT_CACHE_DB)
+chat_cache_lock = threading.Lock()
+chat_cache_counters = {'saved_upstream_seconds': 0.0, 'fetched_answers': 0, 'fetch_seconds': 0.0}
+
+def chat_cache_key(user_message):
+    """Cache key from the prompt version and the case-, whitespace- and end-punctuation-normalised message."""
+    normalised = ' '.join(user_message.casefold().split()).rstrip('?!. ')
+    return f"{CHAT_PROMPT_VERSION}:{hashlib.sha256(normalised.encode()).hexdigest()}"
+
+def cached_chat_answer(key):
+    """Cached answer text for key, counting the upstream time the hit saved; None on a miss."""
+    cached = chat_cache.get(key)
+    if cached is None:
+        return None
+    with chat_cache_lock:
+        chat_cache_counters['saved_upstream_seconds'] += cached['latency']
+    return cached['response']
+
+def store_chat_answer(key, response_text, latency):
+    with chat_cache_lock:
+        chat_cache_counters['fetched_answers'] += 1
+        chat_cache_counters['fetch_seconds'] += latency
+    chat_cache.put(key, {'response': response_text, 'latency': round(latency, 3)})
+
+def chat_cache_stats():
+    """Answer cache counters plus the upstream latency that cache hits avoided."""
+    stats = chat_cache.stats()
+    with chat_cache_lock:
+        fetched = chat_cache_counters['fetched_answers']
+        stats.update(
+            prompt_version=CHAT_PROMPT_VERSION,
+            saved_upstream_seconds=round(chat_cache_counters['saved_upstream_seconds'], 3),
+            mean_upstream_seconds=round(chat_cache_counters['fetch_seconds'] / fetched, 3) if fetched else 0.0
+        )
+    return stats
+
+# Bounds in-flight Gemini calls so slow generations cannot tie up every worker thread
+gemini_slots = threading.BoundedSemaphore(GEMINI_MAX_CONCURRENCY)
+gemini_session_state = {'session': None, 'pid': None}
+gemini_session_lock = threading.Lock()
+
+def gemini_session():
+    """Keep-alive HTTP session for Gemini calls; each process gets its own connection pool."""
+    with gemini_session_lock:
+        if gemini_session_state['pid'] != os.getpid():
+            import requests
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=GEMINI_MAX_CONCURRENCY)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers['Content-Type'] = 'application/json'
+            gemini_session_state.update(session=session, pid=os.getpid())
+        return gemini_session_state['session']
+
+def gemini_payload(user_message):
+    return {
+        'contents': [
+            {
+                'parts': [
+                    {'text': f"{CHAT_SYSTEM_PROMPT}\n\nUser: {user_message}"}
+                ]
             }
-        }
+        ],
+        'generationConfig': CHAT_GENERATION_CONFIG
+    }
+
+def gemini_error_message(status_code):
+    """User-facing message for a non-200 Gemini response."""
+    if status_code == 429:
+        return "API rate limit exceeded. Please try again later."
+    if status_code == 400:
+        return "Invalid request. Please try a different message."
+    return f"API Error: {status_code}"
+
+def gemini_candidate_text(result):
+    """Return (text, error, status_code) for a complete Gemini response; text is None on error."""
+    if 'candidates' not in result or len(result['candidates']) == 0:
+        print(f"ExoAI Chat - No candidates in response: {result}")
+        return None, 'No response generated', 500
+    candidate = result['candidates'][0]
+
+    # Handle different response structures
+    if 'content' not in candidate:
+        print(f"ExoAI Chat - No content in candidate: {candidate}")
+        return None, 'Empty response from AI service', 500
+    content = candidate['content']
+
+    # Check if content has 'parts' field (normal response)
+    if 'parts' in content and len(content['parts']) > 0:
+        return content['parts'][0]['text'], None, 200
+    # Check if content has 'text' field directly (alternative format)
+    if 'text' in content:
+        return content['text'], None, 200
+    # Handle case where content only has role (incomplete response)
+    if 'role' in content and candidate.get('finishReason') == 'MAX_TOKENS':
+        return None, 'Response was truncated due to length limits. Please try a shorter message.', 400
+    print(f"ExoAI Chat - Unknown content structure: {content}")
+    return None, 'Invalid response format from AI service', 500
+
+def sse_event(data):
+    return f"data: {json.dumps(data)}\n\n"
+
+def stream_chat(upstream, cache_key=None, started=None):
+    """Forward Gemini's SSE stream as events of {'delta': text}, ending with {'done': true} or {'error': ...}.
+
+    Holds a Gemini slot until the stream ends or the client goes away. A complete
+    answer is stored in the chat cache under cache_key.
+    """
+    import requests
+    received = []
+    try:
+        # Gemini sends one JSON response chunk per "data:" line
+        upstream.encoding = 'utf-8'
+        for line in upstream.iter_lines(decode_unicode=True):
+            if not line or not line.startswith('data:'):
+                continue
+            chunk = json.loads(line[len('data:'):])
+            for candidate in chunk.get('candidates', [])[:1]:
+                content = candidate.get('content', {})
+                text = ''.join(part.get('text', '') for part in content.get('parts', [])) or content.get('text', '')
+                if text:
+                    received.append(text)
+                    yield sse_event({'delta': text})
+        if received:
+            if cache_key:
+                store_chat_answer(cache_key, ''.join(received), time.time() - started)
+            yield sse_event({'done': True, 'status': 'success'})
+        else:
+            yield sse_event({'error': 'No response generated'})
+    except requests.exceptions.RequestException as e:
+        print(f"ExoAI Chat - Stream interrupted: {str(e)}")
+        yield sse_event({'error': 'Network error. Please check your connection.'})
+    except ValueError as e:
+        print(f"ExoAI Chat - Invalid stream chunk: {str(e)}")
+        yield sse_event({'error': 'Invalid response format from AI service'})
+    finally:
+        upstream.close()
+        gemini_slots.release()
+        if started is not None:
+            metrics.observe('exofinder_stage_seconds', time.time() - started,
+                            endpoint='chat_with_exoai', stage='gemini_stream', mission='')
+
+@app.route('/api/chat', methods=['POST'])
+def chat_with_exoai():
+    """ExoAI Assistant chat endpoint with Gemini API integration (?stream=sse streams the answer)"""
+    import requests
+    try:
+        # Rate limiting
+        client_ip = request.remote_addr
+        allowed, retry_after = chat_rate_limiter.check(client_ip)
+        if not allowed:
+            return jsonify({
+                'error': 'Rate limit exceeded. Please wait before sending another message.',
+                'retry_after': int(retry_after) + 1
+            }), 429
         
-        # Make request to Gemini API
-        response = requests.post(
-            f"{GEMINI_API_URL}?key={GEMINI_API_KEY}",
-            headers=headers,
-            json=payload,
-            timeout=30
-        )
+        data = request.get_json()
+        if not data or 'message' not in data:
+            return jsonify({'error': 'Message is required'}), 400
         
-        if response.status_code == 200:
+        user_message = data['message'].strip()
+        if not user_message or len(user_message) > 500:
+            return jsonify({'error': 'Message must be between 1 and 500 characters'}), 400
+        
+        stream = request.args.get('stream') == 'sse'
+        
+        # Answer repeated questions from the cache without calling Gemini
+        cache_key = chat_cache_key(user_message)
+        cached_answer = cached_chat_answer(cache_key)
+        if cached_answer is not None:
+            if stream:
+                return Response(
+                    sse_event({'delta': cached_answer}) + sse_event({'done': True, 'status': 'success'}),
+                    mimetype='text/event-stream'
+                )
+            return jsonify({
+                'response': cached_answer,
+                'status': 'success'
+            })
+        
+        if not GEMINI_API_KEY:
+            return jsonify({'error': 'ExoAI is not configured on this server.'}), 503
+        
+        # Wait for a free Gemini slot
+        if not gemini_slots.acquire(timeout=GEMINI_QUEUE_TIMEOUT):
+            return jsonify({'error': 'ExoAI is busy. Please try again in a moment.', 'retry_after': 5}), 503
+        
+        # Make request to Gemini API over the pooled session
+        released = False
+        started = time.time()
+        try:
+            # For streams this times the wait for Gemini's response headers
+            with timed_stage('gemini_stream_start' if stream else 'gemini'):
+                response = gemini_session().post(
+                    GEMINI_STREAM_URL if stream else GEMINI_API_URL,
+                    params={'alt': 'sse', 'key': GEMINI_API_KEY} if stream else {'key': GEMINI_API_KEY},
+                    json=gemini_payload(user_message),
+                    timeout=(GEMINI_CONNECT_TIMEOUT, GEMINI_READ_TIMEOUT),
+                    stream=stream
+                )
+            if stream and response.status_code == 200:
+                # The stream generator releases the slot when it finishes
+                released = True
+                g.streamed = True
+                return Response(
+                    stream_chat(response, cache_key, started),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+                )
+            if response.status_code != 200:
+                response.close()
+                return jsonify({'error': gemini_error_message(response.status_code)}), 500
             result = response.json()
-            if 'candidates' in result and len(result['candidates']) > 0:
-                candidate = result['candidates'][0]
-                
-                # Handle different response structures
-                if 'content' in candidate:
-                    content = candidate['content']
-                    
-                    # Check if content has 'parts' field (normal response)
-                    if 'parts' in content and len(content['parts']) > 0:
-                        ai_response = content['parts'][0]['text']
-                        return jsonify({
-                            'response': ai_response,
-                            'status': 'success'
-                        })
-                    # Check if content has 'text' field directly (alternative format)
-                    elif 'text' in content:
-                        ai_response = content['text']
-                        return jsonify({
-                            'response': ai_response,
-                            'status': 'success'
-                        })
-                    # Handle case where content only has role (incomplete response)
-                    elif 'role' in content and candidate.get('finishReason') == 'MAX_TOKENS':
-                        return jsonify({
-                            'error': 'Response was truncated due to length limits. Please try a shorter message.',
-                            'status': 'error'
-                        }), 400
-                    else:
-                        print(f"ExoAI Chat - Unknown content structure: {content}")
-                        return jsonify({'error': 'Invalid response format from AI service'}), 500
-                else:
-                    print(f"ExoAI Chat - No content in candidate: {candidate}")
-                    return jsonify({'error': 'Empty response from AI service'}), 500
-            else:
-                print(f"ExoAI Chat - No candidates in response: {result}")
-                return jsonify({'error': 'No response generated'}), 500
-        else:
-            error_msg = f"API Error: {response.status_code}"
-            if response.status_code == 429:
-                error_msg = "API rate limit exceeded. Please try again later."
-            elif response.status_code == 400:
-                error_msg = "Invalid request. Please try a different message."
-            
-            return jsonify({'error': error_msg}), 500
+        finally:
+            if not released:
+                gemini_slots.release()
+        
+        ai_response, error, status_code = gemini_candidate_text(result)
+        if error:
+            body = {'error': error}
+            if status_code == 400:
+                body['status'] = 'error'
+            return jsonify(body), status_code
+        store_chat_answer(cache_key, ai_response, time.time() - started)
+        return jsonify({
+            'response': ai_response,
+            'status': 'success'
+        })
             
     except requests.exceptions.Timeout:
-        print(f"ExoAI Chat - Timeout error")
+        print("ExoAI Chat - Timeout error")
         return jsonify({'error': 'Request timeout. Please try again.'}), 500
     except requests.exceptions.RequestException as e:
         print(f"ExoAI Chat - Network error: {str(e)}")
@@ -596,7 +2607,7 @@ def chat_with_exoai():
 
 @app.route('/download_results', methods=['POST'])
 def download_results():
-    """Download results as CSV"""
+    """Download results posted back by the client as CSV (legacy; prefer GET /download_results/<result_id>)"""
     try:
         data = request.json
         results = data.get('results', [])
@@ -622,6 +2633,150 @@ def download_results():
     except Exception as e:
         return jsonify({'error': f'Error downloading results: {str(e)}'}), 500
 
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    """Queue a CSV file for asynchronous scoring and return its job ID immediately"""
+    try:
+        if 'file' not in request.files:
+            return jsonify({'error': 'No file uploaded'}), 400
+        
+        file = request.files['file']
+        if file.filename == '':
+            return jsonify({'error': 'No file selected'}), 400
+        
+        if not allowed_upload(file.filename):
+            return jsonify({'error': 'Please upload a CSV (optionally .gz or .zst), Parquet, Feather or Arrow file'}), 400
+        
+        mission = request.form.get('mission', 'kepler')
+        if mission != AUTO_MISSION and mission not in MISSION_CONFIGS:
+            return jsonify({'error': f'Unsupported mission: {mission}'}), 400
+        
+        # Fail fast here rather than inside the worker if a model is unavailable
+        for model_mission in route_missions(mission):
+            if not load_model(model_mission):
+                return jsonify({'error': f'{model_mission.capitalize()} model loading failed'}), 500
+        
+        job_id = submit_scoring_job(file, mission)
+        if job_id is None:
+            return jsonify({'error': 'Too many queued jobs. Please try again later.', 'retry_after': 30}), 503
+        
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status_url': f'/jobs/{job_id}',
+            'mission': mission
+        }), 202
+        
+    except Exception as e:
+        return jsonify({'error': f'Error creating job: {str(e)}'}), 500
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Job status and progress; finished jobs include a result_id for /download_results/<result_id>"""
+    status = read_job_status(job_id)
+    if status is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if status.get('status') == 'done':
+        status['download_url'] = f"/download_results/{status['result_id']}"
+    return jsonify(status)
+
+@app.route('/api/job_stats')
+def get_job_stats():
+    """Job queue depth, durations and worker utilisation"""
+    return jsonify(job_stats())
+
+@app.route('/results/<result_id>', methods=['GET'])
+def get_results_page(result_id):
+    """One page of stored results, optionally filtered by class, mission or confidence and sorted by any column"""
+    stored = result_store.load(result_id)
+    if stored is None:
+        return jsonify({'error': 'Results not found or expired'}), 404
+    meta, arrays = stored
+
+    offset = request.args.get('offset', 0, type=int)
+    limit = request.args.get('limit', 100, type=int)
+    if offset < 0 or not 0 < limit <= RESULTS_PAGE_MAX_ROWS:
+        return jsonify({'error': f'offset must be non-negative and limit between 1 and {RESULTS_PAGE_MAX_ROWS}'}), 400
+    sort = request.args.get('sort') or None
+    if sort is not None and sort not in meta['columns']:
+        return jsonify({'error': f'Unknown sort column: {sort}'}), 400
+    order = request.args.get('order', 'asc')
+    if order not in ('asc', 'desc'):
+        return jsonify({'error': f'Unsupported sort order: {order}'}), 400
+
+    with timed_stage('results_view', meta['mission']):
+        rows = result_view(
+            result_id, meta, arrays, sort, order == 'desc',
+            classes=request.args.getlist('class'),
+            missions=request.args.getlist('mission'),
+            min_confidence=request.args.get('min_confidence', type=float),
+            max_confidence=request.args.get('max_confidence', type=float)
+        )
+        if rows is None:
+            matched_rows = meta['total_rows']
+            page = result_store.frame(meta, arrays, offset, offset + limit)
+        else:
+            matched_rows = len(rows)
+            page = result_store.frame(meta, arrays, rows=rows[offset:offset + limit])
+    with timed_stage('serialize', meta['mission']):
+        return jsonify({
+            'success': True,
+            'result_id': result_id,
+            'mission': meta['mission'],
+            'total_rows': meta['total_rows'],
+            'matched_rows': matched_rows,
+            'offset': offset,
+            'class_counts': class_counts(meta, arrays),
+            'results': page.to_dict('records')
+        })
+
+@app.route('/download_results/<result_id>', methods=['GET'])
+def download_stored_results(result_id):
+    """Stream stored results as CSV (default) or Parquet without rebuilding them from the client"""
+    try:
+        stored = result_store.load(result_id)
+        if stored is None:
+            return jsonify({'error': 'Results not found or expired'}), 404
+        meta, arrays = stored
+    
+        export_format = request.args.get('format', 'csv')
+        if export_format == 'parquet':
+            try:
+                import pyarrow
+                import pyarrow.parquet as pq
+            except ImportError:
+                return jsonify({'error': 'Parquet export requires pyarrow to be installed'}), 400
+            # Write row groups straight from the stored columns into a temporary file on disk
+            tmp = tempfile.NamedTemporaryFile(suffix='.parquet')
+            writer = None
+            # An empty result still writes one (empty) table, so the file is valid and carries the schema
+            for start in range(0, max(meta['total_rows'], 1), DOWNLOAD_CHUNK_ROWS):
+                table = pyarrow.Table.from_pandas(
+                    result_store.frame(meta, arrays, start, start + DOWNLOAD_CHUNK_ROWS), preserve_index=False
+                )
+                writer = writer or pq.ParquetWriter(tmp.name, table.schema)
+                writer.write_table(table)
+            writer.close()
+            return send_file(tmp.name, mimetype='application/vnd.apache.parquet', as_attachment=True,
+                             download_name='exoplanet_predictions.parquet')
+        if export_format != 'csv':
+            return jsonify({'error': f'Unsupported download format: {export_format}'}), 400
+    
+        def generate():
+            yield ','.join(meta['columns']) + '\n'
+            for start in range(0, meta['total_rows'], DOWNLOAD_CHUNK_ROWS):
+                chunk = result_store.frame(meta, arrays, start, start + DOWNLOAD_CHUNK_ROWS)
+                yield chunk.to_csv(index=False, header=False)
+    
+        return Response(
+            generate(),
+            mimetype='text/csv',
+            headers={'Content-Disposition': 'attachment; filename=exoplanet_predictions.csv'}
+        )
+        
+    except Exception as e:
+        return jsonify({'error': f'Error downloading results: {str(e)}'}), 500
+
 @app.route('/sample_kepler_data.csv')
 def download_sample_kepler():
     return send_file('sample_kepler_data.csv', as_attachment=True)
@@ -630,14 +2785,9 @@ def download_sample_kepler():
 
 if __name__ == '__main__':
     print("Starting ExoFinder Multi-Mission Application...")
-    # Load models for all missions on startup
-    print("Loading Kepler model...")
-    load_model('kepler')
-    print("Loading K2 model...")
-    load_model('k2')
-    print("Loading TESS model...")
-    load_model('tess')
-    print("All models loaded. Starting Flask server...")
+    # Load and warm up models for all missions in the background; /readyz reports when they are done
+    start_warmup()
+    print("Warming up models in the background. Starting Flask server...")
     
     # Production configuration for Render
     port = int(os.environ.get('PORT', 5000))
@@ -0,0 +1,807 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the ExoFinder prediction hot paths.
+
+Usage:
+    python benchmark.py coerce [--sizes 10000 1000000 10000000]
+    python benchmark.py predict [--missions kepler k2 tess] [--rows 1000 100000]
+    python benchmark.py engine [--missions kepler k2 tess] [--rows 1 100 512 10000]
+    python benchmark.py shards [--rows 1000000] [--max-workers N] [--backend thread|process]
+    python benchmark.py ingest [--missions kepler k2 tess] [--rows 1000000] [--columns 200]
+    python benchmark.py chat [--requests 20] [--concurrency 16]
+    python benchmark.py ratelimit [--keys 100000] [--request-interval 0.01]
+    python benchmark.py rescore [--missions kepler k2 tess] [--rows 50000] [--changed 300]
+    python benchmark.py impute [--missions kepler k2 tess] [--rows 2000] [--missing 0.2] [--chunk-sizes 500 7 1]
+    python benchmark.py routing [--rows 500] [--sparsity 0.3]
+    python benchmark.py startup [--repeat 5] [--top 10]
+    python benchmark.py suite [--missions ...] [--rows 1000 100000 1000000] [--missing 0 0.2]
+                              [--scientific 0 0.5] [--output FILE] [--compare PREVIOUS.json]
+"""
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+
+# Chat benchmarks talk to a local Gemini stub, which still needs some API key configured
+os.environ.setdefault('GEMINI_API_KEY', 'benchmark')
+
+import app
+import imputation_profiles
+import tree_engine
+
+
+def timed(func, *args, repeat=3, **kwargs):
+    """Return the best wall-clock time in seconds over `repeat` runs and the last result."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def make_raw_column(n_cells, seed=0):
+    """Build an object column mixing decimal, scientific and whitespace-padded strings plus blanks."""
+    rng = np.random.default_rng(seed)
+    values = rng.lognormal(mean=0.0, sigma=4.0, size=n_cells)
+    kind = rng.integers(0, 4, size=n_cells)
+    strings = np.where(kind == 0, np.char.mod('%.6f', values),
+              np.where(kind == 1, np.char.mod('%.4e', values),
+              np.where(kind == 2, np.char.mod('  %.3E ', values), '')))
+    column = pd.Series(strings, dtype=object)
+    column[column == ''] = np.nan
+    return column
+
+
+def convert_scientific_notation(value):
+    """Convert scientific notation strings to decimal format"""
+    try:
+        # Handle string values that might be in scientific notation
+        if isinstance(value, str):
+            value = value.strip()
+            # Check if it contains 'E' or 'e' (scientific notation)
+            if 'E' in value.upper():
+                # Convert to float first, then back to string to get decimal format
+                float_val = float(value)
+                # Format with enough precision to avoid losing data
+                return f"{float_val:.10f}".rstrip('0').rstrip('.')
+        return value
+    except (ValueError, TypeError):
+        return value
+
+
+def legacy_coerce(column):
+    """Original preprocess_data path: per-cell convert_scientific_notation, then to_numeric."""
+    return pd.to_numeric(column.astype(str).apply(convert_scientific_notation), errors='coerce')
+
+
+def bench_coerce(sizes):
+    print(f"{'cells':>12} {'legacy (s)':>12} {'vectorized (s)':>15} {'speedup':>9}")
+    for n_cells in sizes:
+        column = make_raw_column(n_cells)
+        # The legacy path is slow enough that a single run is representative at scale
+        legacy_time, legacy = timed(legacy_coerce, column, repeat=1 if n_cells > 1_000_000 else 3)
+        fast_time, fast = timed(app.coerce_numeric, column)
+        # Same NaN positions; values agree except where the legacy path truncated to 10 decimals
+        assert legacy.isna().equals(fast.isna())
+        assert np.allclose(legacy, fast, rtol=1e-6, atol=1e-10, equal_nan=True)
+        print(f"{n_cells:>12,} {legacy_time:>12.3f} {fast_time:>15.3f} {legacy_time / fast_time:>8.1f}x")
+
+
+def two_pass_predict(pipeline, X):
+    """Original endpoint path: predict() and predict_proba() each walk the whole ensemble."""
+    predictions = pipeline.model.predict(X)
+    probabilities = pipeline.model.predict_proba(X)
+    return predictions, np.max(probabilities, axis=1)
+
+
+def bench_predict(missions, row_counts):
+    print(f"{'mission':>8} {'rows':>10} {'two-pass (s)':>13} {'single-pass (s)':>16} {'speedup':>9}")
+    for mission in missions:
+        if not app.load_model(mission):
+            print(f"{mission:>8} skipped: model could not be loaded")
+            continue
+        pipeline = app.pipelines[mission]
+        rng = np.random.default_rng(0)
+        for n_rows in row_counts:
+            X = rng.normal(size=(n_rows, len(pipeline.features)))
+            two_pass_time, (predictions, _) = timed(two_pass_predict, pipeline, X)
+            single_pass_time, _ = timed(pipeline.predict, X)
+            pipeline.check_consistency(X)
+            print(f"{mission:>8} {n_rows:>10,} {two_pass_time:>13.3f} {single_pass_time:>16.3f} "
+                  f"{two_pass_time / single_pass_time:>8.1f}x")
+
+
+def bench_engine(missions, row_counts):
+    # Time the flat traversal itself rather than the scikit-learn fallback for large batches
+    tree_engine.MAX_ROWS = 0
+    print(f"{'mission':>8} {'rows':>10} {'sklearn (s)':>12} {'flat engine (s)':>16} {'speedup':>9} {'max |diff|':>11}")
+    for mission in missions:
+        if not app.load_model(mission):
+            print(f"{mission:>8} skipped: model could not be loaded")
+            continue
+        model = app.pipelines[mission].model
+        try:
+            engine = tree_engine.compile_model(model)
+        except ValueError as e:
+            print(f"{mission:>8} skipped: {str(e)}")
+            continue
+        rng = np.random.default_rng(0)
+        for n_rows in row_counts:
+            X = rng.normal(size=(n_rows, len(app.pipelines[mission].features)))
+            sklearn_time, expected = timed(model.predict_proba, X)
+            engine_time, actual = timed(engine.predict_proba, X)
+            print(f"{mission:>8} {n_rows:>10,} {sklearn_time:>12.3f} {engine_time:>16.3f} "
+                  f"{sklearn_time / engine_time:>8.1f}x {np.abs(expected - actual).max():>11.2e}")
+
+
+def make_catalog(mission, n_rows, seed=0):
+    """Synthetic catalog with every required feature and identifier column of a mission."""
+    config = app.MISSION_CONFIGS[mission]
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(n_rows, len(config['required_features']))),
+                      columns=config['required_features'])
+    for id_col in config['identifier_columns']:
+        df[id_col] = [f'{id_col}-{i}' for i in range(n_rows)]
+    return df
+
+
+def bench_shards(n_rows, max_workers, backend):
+    if not app.load_model('kepler'):
+        print("kepler model could not be loaded")
+        return
+    app.SCORING_BACKEND = backend
+    catalog = make_catalog('kepler', n_rows)
+    baseline = None
+    print(f"Scoring {n_rows:,} synthetic Kepler rows with the {backend} backend on {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'time (s)':>10} {'speedup':>9}")
+    for workers in range(1, max_workers + 1):
+        # Pools are long-lived in the server, so start this one (its processes load the models) untimed
+        app.score_dataframe(catalog.head(app.SHARD_MIN_ROWS), 'kepler', shards=workers)
+        elapsed, results = timed(app.score_dataframe, catalog, 'kepler', shards=workers, repeat=1)
+        # Sharded results must come back in the original row order
+        assert (results['kepoi_name'].to_numpy() == catalog['kepoi_name'].to_numpy()).all()
+        if baseline is None:
+            baseline, baseline_results = elapsed, results
+        assert results.equals(baseline_results)
+        print(f"{workers:>8} {elapsed:>10.2f} {baseline / elapsed:>8.2f}x")
+
+
+def write_archive_export(path, mission, n_rows, n_columns, seed=0, chunk_rows=100_000):
+    """Write a wide synthetic archive export: the mission's columns padded with unrelated ones."""
+    config = app.MISSION_CONFIGS[mission]
+    n_extra = max(n_columns - len(config['required_features']) - len(config['identifier_columns']), 0)
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_rows, chunk_rows):
+        chunk = make_catalog(mission, min(chunk_rows, n_rows - start), seed=seed + start)
+        extra = pd.DataFrame(rng.normal(size=(len(chunk), n_extra)), columns=[f'extra_{i}' for i in range(n_extra)])
+        # Roughly one in five archive columns is text (references, flags, facility names)
+        for column in extra.columns[::5]:
+            extra[column] = np.where(extra[column] > 0, 'ref_a', 'ref_b')
+        pd.concat([chunk, extra], axis=1).to_csv(path, mode='a', index=False, header=(start == 0))
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process (VmHWM) in MB."""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def measure_ingest(path, mission, pruned):
+    """Time one CSV read in a fresh process and report its peak RSS growth in MB."""
+    app.load_model(mission)
+    # Reset the peak RSS mark so model loading does not count towards the read (Linux 4.0+)
+    with open('/proc/self/clear_refs', 'w') as f:
+        f.write('5')
+    baseline_mb = peak_rss_mb()
+    start = time.perf_counter()
+    with open(path, 'rb') as f:
+        df = app.read_catalog_csv(f, mission) if pruned else pd.read_csv(f, comment='#')
+    elapsed = time.perf_counter() - start
+    return elapsed, peak_rss_mb() - baseline_mb, df.memory_usage(deep=True).sum() / 1024 ** 2
+
+
+def bench_ingest(missions, n_rows, n_columns):
+    # Each read runs in a spawned process so allocator state is not inherited from earlier runs
+    context = multiprocessing.get_context('spawn')
+    print(f"{'mission':>8} {'reader':>8} {'parse (s)':>10} {'peak RSS (MB)':>14} {'frame (MB)':>11}")
+    for mission in missions:
+        with tempfile.NamedTemporaryFile(suffix='.csv') as export:
+            write_archive_export(export.name, mission, n_rows, n_columns)
+            for pruned in (False, True):
+                with context.Pool(1) as pool:
+                    elapsed, peak_mb, frame_mb = pool.apply(measure_ingest, (export.name, mission, pruned))
+                reader = 'pruned' if pruned else 'full'
+                print(f"{mission:>8} {reader:>8} {elapsed:>10.2f} {peak_mb:>14.0f} {frame_mb:>11.0f}")
+
+
+class GeminiStubHandler(BaseHTTPRequestHandler):
+    """Stands in for the Gemini API: a fixed delay before the first token, then the answer in chunks."""
+
+    protocol_version = 'HTTP/1.1'
+    first_token_delay = 0.3
+    chunk_delay = 0.05
+    chunks = ['## Exoplanets\n\n', 'A **false positive** is a signal ', 'that mimics a transit ',
+              'but is caused by something else, ', 'such as an eclipsing binary. 🪐']
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with self.server.lock:
+            self.server.in_flight += 1
+            self.server.peak_in_flight = max(self.server.peak_in_flight, self.server.in_flight)
+        try:
+            time.sleep(self.first_token_delay)
+            if ':streamGenerateContent' in self.path:
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                for i, text in enumerate(self.chunks):
+                    if i:
+                        time.sleep(self.chunk_delay)
+                    event = {'candidates': [{'content': {'parts': [{'text': text}], 'role': 'model'}}]}
+                    data = f"data: {json.dumps(event)}\r\n\r\n".encode()
+                    self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+            else:
+                time.sleep(self.chunk_delay * (len(self.chunks) - 1))
+                body = json.dumps({'candidates': [{'content': {'parts': [{'text': ''.join(self.chunks)}],
+                                                               'role': 'model'}}]}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client stopped reading the stream
+        finally:
+            with self.server.lock:
+                self.server.in_flight -= 1
+
+
+def start_gemini_stub():
+    """Run the stub on a free local port and point the app's Gemini URLs at it."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), GeminiStubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = server.in_flight = server.peak_in_flight = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}/v1beta/models/stub"
+    app.GEMINI_API_URL = f"{base}:generateContent"
+    app.GEMINI_STREAM_URL = f"{base}:streamGenerateContent"
+    return server
+
+
+def chat_request(client, stream, message='What is a false positive?'):
+    """Send one /api/chat message; return (seconds to first answer text, seconds to complete answer)."""
+    start = time.perf_counter()
+    if not stream:
+        response = client.post('/api/chat', json={'message': message})
+        assert response.json['status'] == 'success', response.json
+        elapsed = time.perf_counter() - start
+        return elapsed, elapsed
+    response = client.post('/api/chat?stream=sse', json={'message': message}, buffered=False)
+    first_token = None
+    for data in response.response:
+        if first_token is None and b'"delta"' in data:
+            first_token = time.perf_counter() - start
+    response.close()
+    return first_token, time.perf_counter() - start
+
+
+def bench_chat(n_requests, concurrency):
+    server = start_gemini_stub()
+    app.chat_rate_limiter = app.RateLimiter(0, app.CHAT_TIME_WINDOW)
+    client = app.app.test_client()
+    print(f"Gemini stub: {GeminiStubHandler.first_token_delay:.2f}s to first token, "
+          f"{len(GeminiStubHandler.chunks)} chunks {GeminiStubHandler.chunk_delay:.2f}s apart")
+    print(f"{'mode':>9} {'first text (s)':>15} {'complete (s)':>13} {'connections':>12}")
+    for stream in (False, True):
+        connections = server.connections
+        # Distinct messages, so every request reaches the stub rather than the answer cache
+        timings = [chat_request(client, stream, f'Tell me about planet {stream}-{i}') for i in range(n_requests)]
+        first, complete = (sum(t[i] for t in timings) / n_requests for i in range(2))
+        print(f"{'sse' if stream else 'blocking':>9} {first:>15.3f} {complete:>13.3f} {server.connections - connections:>12}")
+
+    # Concurrent messages beyond GEMINI_MAX_CONCURRENCY queue for a slot instead of piling onto Gemini
+    server.peak_in_flight = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(lambda i: chat_request(app.app.test_client(), True, f'Concurrent question {i}'),
+                          range(concurrency)))
+    print(f"{concurrency} concurrent streamed messages: {time.perf_counter() - start:.2f}s, "
+          f"peak upstream concurrency {server.peak_in_flight} (limit {app.GEMINI_MAX_CONCURRENCY})")
+
+    # A handful of popular questions asked over and over, with varying case and punctuation
+    questions = ['What is a false positive?', 'how does exofinder work', 'What is the transit method?']
+    before = app.chat_cache_stats()
+    start = time.perf_counter()
+    for i in range(n_requests):
+        question = questions[i % len(questions)]
+        chat_request(client, i % 2 == 1, question.upper() if i % 3 == 0 else question)
+    after = app.chat_cache_stats()
+    hits = after['hits'] - before['hits']
+    saved = after['saved_upstream_seconds'] - before['saved_upstream_seconds']
+    print(f"{n_requests} repeated questions: {time.perf_counter() - start:.2f}s, answer cache hit rate "
+          f"{hits / n_requests:.0%}, {saved:.2f}s of upstream latency saved")
+    server.shutdown()
+
+
+class LegacyRateLimiter:
+    """Original limiter: a list of request times per IP, rebuilt on every check and never evicted."""
+
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self.requests = {}
+
+    def check(self, key, now):
+        times = [t for t in self.requests.get(key, []) if now - t < self.window]
+        self.requests[key] = times
+        if len(times) >= self.limit:
+            return False, self.window
+        times.append(now)
+        return True, 0.0
+
+
+def bench_ratelimit(n_keys, request_interval):
+    """Feed n_keys distinct client IPs through each limiter on a simulated clock.
+
+    Requests arrive every request_interval seconds, so IPs go idle once they are a
+    rate-limit window old; memory should level off for the new limiter.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        limiters = [
+            ('legacy', LegacyRateLimiter(app.CHAT_RATE_LIMIT, app.CHAT_TIME_WINDOW)),
+            ('bucket', app.RateLimiter(app.CHAT_RATE_LIMIT, app.CHAT_TIME_WINDOW)),
+            ('sqlite', app.RateLimiter(app.CHAT_RATE_LIMIT, app.CHAT_TIME_WINDOW, os.path.join(tmp, 'limit.sqlite'))),
+        ]
+        checkpoints = np.linspace(0, n_keys, 6).astype(int)[1:]
+        print(f"{n_keys:,} distinct IPs, one request every {request_interval * 1000:g} ms (simulated), "
+              f"limit {app.CHAT_RATE_LIMIT}/{app.CHAT_TIME_WINDOW}s")
+        print(f"{'limiter':>8} {'requests':>9} {'tracked keys':>13} {'memory (MB)':>12} {'us/check':>9}")
+        for name, limiter in limiters:
+            tracemalloc.start()
+            start = time.perf_counter()
+            done = 0
+            for checkpoint in checkpoints:
+                for i in range(done, checkpoint):
+                    limiter.check(f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}', now=i * request_interval)
+                done = checkpoint
+                elapsed = time.perf_counter() - start
+                tracked = len(limiter.requests) if name == 'legacy' else limiter.stats()['tracked_keys']
+                memory = tracemalloc.get_traced_memory()[0] / 1024 ** 2
+                if name == 'sqlite':
+                    memory = os.path.getsize(os.path.join(tmp, 'limit.sqlite')) / 1024 ** 2
+                print(f"{name:>8} {done:>9,} {tracked:>13,} {memory:>12.2f} {elapsed / done * 1e6:>9.1f}")
+            tracemalloc.stop()
+
+        # Repeated requests from one IP are still limited after the first CHAT_RATE_LIMIT
+        for name, limiter in limiters[1:]:
+            results = [limiter.check('192.0.2.1', now=n_keys * request_interval + 1)[0]
+                       for _ in range(app.CHAT_RATE_LIMIT + 5)]
+            print(f"{name}: {sum(results)} of {len(results)} burst requests from one IP allowed")
+
+
+def bench_rescore(missions, n_rows, n_changed):
+    """Score a catalog, change n_changed rows, and score it again with and without the score index."""
+    print(f"{'mission':>8} {'rows':>8} {'changed':>8} {'full (s)':>9} {'first (s)':>10} "
+          f"{'rescore (s)':>12} {'reused':>8} {'recomputed':>11} {'speedup':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mission in missions:
+            if not app.load_model(mission):
+                print(f"{mission:>8} skipped: model could not be loaded")
+                continue
+            catalog = make_catalog(mission, n_rows)
+            update = catalog.copy()
+            changed = np.random.default_rng(1).choice(n_rows, size=min(n_changed, n_rows), replace=False)
+            feature = app.MISSION_CONFIGS[mission]['required_features'][0]
+            update.loc[changed, feature] += 1.0
+
+            app.score_index = app.ScoreIndex('')
+            full_time, expected = timed(app.score_dataframe, update, mission, repeat=1)
+            app.score_index = app.ScoreIndex(os.path.join(tmp, f'{mission}.db'))
+            first_time, _ = timed(app.score_dataframe, catalog, mission, repeat=1)
+            rescore_time, results = timed(app.score_dataframe, update, mission, repeat=1)
+            # Reused predictions must be exactly what scoring the update from scratch gives
+            assert results.equals(expected)
+            print(f"{mission:>8} {n_rows:>8,} {len(changed):>8,} {full_time:>9.3f} {first_time:>10.3f} "
+                  f"{rescore_time:>12.3f} {results.attrs['rows_reused']:>8,} "
+                  f"{results.attrs['rows_recomputed']:>11,} {full_time / rescore_time:>8.1f}x")
+
+
+def score_upload(client, mission, csv_bytes, chunk_size=None):
+    """(Predicted_Class, Confidence) of every row from /predict_csv, whole-file or streamed in chunks."""
+    url = f'/predict_csv?stream=ndjson&chunk_size={chunk_size}' if chunk_size else '/predict_csv'
+    response = client.post(url, data={'mission': mission, 'file': (io.BytesIO(csv_bytes), 'catalog.csv')})
+    assert response.status_code == 200, response.get_data()[:200]
+    if chunk_size:
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()[:-1]]
+    else:
+        rows = response.get_json()['results']
+    return [(row['Predicted_Class'], row['Confidence']) for row in rows]
+
+
+def bench_impute(missions, n_rows, missing_ratio, chunk_sizes):
+    """Chunked vs whole-file scoring with per-upload medians and with a training-set imputation profile.
+
+    With a profile every chunk size must reproduce the whole-file results exactly.
+    """
+    client = app.app.test_client()
+    print(f"{'mission':>8} {'imputation':>11} {'prepare (s)':>12} "
+          + ' '.join(f"{f'diff@{size}':>10}" for size in chunk_sizes))
+    with tempfile.TemporaryDirectory() as tmp:
+        app.csv_result_cache = app.FileResultCache('', 0)
+        app.result_store = app.ResultStore(tmp, app.RESULT_STORE_TTL)
+        for mission in missions:
+            config = app.MISSION_CONFIGS[mission]
+            original_path = config['imputation_path']
+            try:
+                # Profile from a synthetic training catalog; the upload also lacks one feature column entirely
+                training_path = os.path.join(tmp, f'{mission}_training.csv')
+                with open(training_path, 'wb') as f:
+                    f.write(make_suite_csv(mission, 20_000, missing_ratio, 0.0, seed=1))
+                profile = imputation_profiles.profile_from_catalog(mission, training_path)
+                profile_path = os.path.join(tmp, f'{mission}_imputation.pkl')
+                joblib.dump(profile, profile_path)
+                upload = pd.read_csv(io.BytesIO(make_suite_csv(mission, n_rows, missing_ratio, 0.0, seed=2)))
+                upload = upload.drop(columns=config['required_features'][-1])
+                csv_bytes = upload.to_csv(index=False).encode()
+
+                for label, path in (('medians', os.path.join(tmp, 'missing.pkl')), ('profile', profile_path)):
+                    config['imputation_path'] = path
+                    app.pipelines.pop(mission, None)
+                    if not app.load_model(mission):
+                        print(f"{mission:>8} skipped: model could not be loaded")
+                        break
+                    prepare_time, _ = timed(app.pipelines[mission].prepare, upload)
+                    whole = score_upload(client, mission, csv_bytes)
+                    # Rows missing from a stream that failed part-way count as differing
+                    differing = [len(whole) - sum(a == b for a, b in zip(whole, score_upload(client, mission, csv_bytes, size)))
+                                 for size in chunk_sizes]
+                    if label == 'profile':
+                        assert not any(differing), f"{mission}: chunked results differ from whole-file results"
+                    print(f"{mission:>8} {label:>11} {prepare_time:>12.4f} "
+                          + ' '.join(f"{count:>10,}" for count in differing))
+            finally:
+                config['imputation_path'] = original_path
+                app.pipelines.pop(mission, None)
+
+
+# Sample catalogs shipped with the app and the mission each belongs to
+SAMPLE_CATALOGS = {'sample_data.csv': 'kepler', 'sample_kepler_data.csv': 'kepler',
+                   'sample_k2_data.csv': 'k2', 'sample_tess_data.csv': 'tess'}
+
+
+def bench_routing(n_rows, sparsity):
+    """mission=auto routing of the sample catalogs and of a sparse synthetic merged catalog.
+
+    Every sample catalog row must go to its own mission. sample_tess_data.csv also has
+    K2's pl_name column, so it checks identifiers do not outweigh feature coverage.
+    """
+    client = app.app.test_client()
+    app.csv_result_cache = app.FileResultCache('', 0)
+    print(f"{'catalog':>24} {'rows':>6} {'routed':>30} {'time (s)':>9}")
+    for name, mission in SAMPLE_CATALOGS.items():
+        with open(name, 'rb') as f:
+            csv_bytes = f.read()
+        elapsed, response = timed(client.post, '/predict_csv', repeat=1,
+                                  data={'mission': app.AUTO_MISSION, 'file': (io.BytesIO(csv_bytes), name)})
+        counts = response.get_json()['mission_counts']
+        assert set(counts) == {mission}, f"{name}: rows routed to {counts}, expected {mission}"
+        print(f"{name:>24} {sum(counts.values()):>6} {json.dumps(counts):>30} {elapsed:>9.3f}")
+
+    rng = np.random.default_rng(0)
+    parts = []
+    for seed, mission in enumerate(app.MISSION_CONFIGS):
+        catalog = make_catalog(mission, n_rows, seed=seed)
+        features = app.MISSION_CONFIGS[mission]['required_features']
+        catalog[features] = catalog[features].mask(rng.random((n_rows, len(features))) < sparsity)
+        parts.append(catalog.assign(truth=mission))
+    merged = pd.concat(parts, ignore_index=True).sample(frac=1, random_state=0).reset_index(drop=True)
+    elapsed, routed = timed(app.detect_missions, merged.drop(columns='truth'))
+    accuracy = (routed == merged['truth'].to_numpy()).mean()
+    print(f"{'synthetic merged':>24} {len(merged):>6} {f'accuracy {accuracy:.3f}':>30} {elapsed:>9.3f}")
+
+
+# Run in a fresh interpreter per measurement, since this process has already imported everything
+STARTUP_SCRIPT = """
+import json, time
+start = time.perf_counter()
+{eager}
+import app
+result = {{'import': time.perf_counter() - start}}
+client = app.app.test_client()
+if {warm}:
+    app.start_warmup().join()
+    result['ready'] = time.perf_counter() - start
+    result['load_times'] = dict(app.load_times)
+request_start = time.perf_counter()
+response = client.post('/predict_manual', json={{'mission': {mission!r}}})
+assert response.status_code == 200, response.get_data()[:200]
+result['first_request'] = time.perf_counter() - request_start
+print(json.dumps(result))
+"""
+
+# What importing app.py cost before scikit-learn and requests were deferred
+EAGER_IMPORTS = 'import requests, sklearn.ensemble, sklearn.preprocessing'
+
+
+def run_startup(eager=False, warm=False, mission='kepler'):
+    script = STARTUP_SCRIPT.format(eager=EAGER_IMPORTS if eager else '', warm=warm, mission=mission)
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def bench_startup(repeat, top):
+    """Cold-start costs in fresh interpreters: import time, time to ready, and first-request latency."""
+    print(f"{'import':>18} {'best (s)':>9} {'median (s)':>11}")
+    for label, eager in (('eager sklearn', True), ('deferred', False)):
+        times = [run_startup(eager=eager)['import'] for _ in range(repeat)]
+        print(f"{label:>18} {min(times):>9.3f} {np.median(times):>11.3f}")
+
+    # -X importtime reports cumulative microseconds per module on stderr, in the order imports finish,
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                            capture_output=True, text=True, check=True).stderr
+    # and indents each nested import by two more spaces; keep the modules app.py imports directly
+    modules = []
+    for line in stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            name = fields[2][1:]
+            if len(name) - len(name.lstrip()) == 2:
+                modules.append((int(fields[1]), name.strip()))
+    print("\nSlowest direct imports of app.py:")
+    for cumulative, name in sorted(modules, reverse=True)[:top]:
+        print(f"{name:>30} {cumulative / 1e6:>8.3f}s")
+
+    cold = run_startup()
+    warm = run_startup(warm=True)
+    loads = ', '.join(f"{mission}={seconds:.2f}s" for mission, seconds in warm['load_times'].items())
+    print(f"\nReady after {warm['ready']:.2f}s ({loads})")
+    print(f"First /predict_manual: {cold['first_request']:.3f}s cold, {warm['first_request']:.4f}s after warm-up "
+          f"({cold['first_request'] / warm['first_request']:.0f}x)")
+
+
+SUITE_STAGES = ['csv_parse', 'preprocess', 'scale', 'predict', 'score_dataframe',
+                'serialize_json', 'serialize_columns', 'serialize_csv', 'end_to_end']
+
+
+def make_suite_csv(mission, n_rows, missing_ratio, scientific_ratio, seed=0, chunk_rows=200_000):
+    """CSV bytes of a synthetic catalog with the given share of blank and scientific-notation feature cells."""
+    features = app.MISSION_CONFIGS[mission]['required_features']
+    rng = np.random.default_rng(seed)
+    output = io.StringIO()
+    for start in range(0, n_rows, chunk_rows):
+        chunk = make_catalog(mission, min(chunk_rows, n_rows - start), seed=seed + start)
+        for feature in features:
+            values = chunk[feature].to_numpy() * 10.0 ** rng.integers(-6, 6, size=len(chunk))
+            if scientific_ratio:
+                scientific = rng.random(len(chunk)) < scientific_ratio
+                column = np.char.mod('%.6f', values).astype(object)
+                column[scientific] = np.char.mod('%.6e', values[scientific])
+            else:
+                column = values
+            chunk[feature] = column
+            if missing_ratio:
+                chunk.loc[rng.random(len(chunk)) < missing_ratio, feature] = np.nan
+        chunk.to_csv(output, index=False, header=(start == 0))
+    return output.getvalue().encode()
+
+
+def time_suite_case(mission, n_rows, missing_ratio, scientific_ratio, repeat):
+    """Per-stage best times in seconds for one synthetic catalog."""
+    csv_bytes = make_suite_csv(mission, n_rows, missing_ratio, scientific_ratio)
+    pipeline = app.pipelines[mission]
+    times = {}
+    times['csv_parse'], df = timed(lambda: app.read_catalog(io.BytesIO(csv_bytes), mission), repeat=repeat)
+    times['preprocess'], X = timed(pipeline.prepare, df, repeat=repeat)
+    times['scale'], X = timed(pipeline.scale, X, repeat=repeat)
+    times['predict'], _ = timed(app.predict_matrix, mission, X, repeat=repeat)
+    times['score_dataframe'], results_df = timed(app.score_dataframe, df, mission, repeat=repeat)
+    with app.app.app_context():
+        times['serialize_json'], _ = timed(
+            lambda: app.jsonify({'success': True, 'results': results_df.to_dict('records')}).get_data(), repeat=repeat)
+    times['serialize_columns'], _ = timed(app.columnar_json, results_df, success=True, repeat=repeat)
+    times['serialize_csv'], _ = timed(results_df.to_csv, index=False, repeat=repeat)
+
+    # Uploads over MAX_CONTENT_LENGTH can only go through the streaming mode
+    client = app.app.test_client()
+    streamed = len(csv_bytes) > app.app.config['MAX_CONTENT_LENGTH']
+    url = '/predict_csv?stream=ndjson' if streamed else '/predict_csv'
+
+    def post():
+        response = client.post(url, data={'mission': mission, 'file': (io.BytesIO(csv_bytes), 'catalog.csv')})
+        assert response.status_code == 200, response.get_data()[:200]
+        return response.get_data()
+    times['end_to_end'], _ = timed(post, repeat=repeat)
+    return times, len(csv_bytes), 'ndjson' if streamed else 'json'
+
+
+def run_metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'scikit-learn': sklearn.__version__,
+    }
+
+
+def bench_suite(missions, row_counts, missing_ratios, scientific_ratios, output, compare, repeat):
+    previous = {}
+    if compare:
+        with open(compare) as f:
+            previous = {(r['mission'], r['rows'], r['missing_ratio'], r['scientific_ratio'], r['stage']): r['seconds']
+                        for r in json.load(f)['results']}
+
+    records = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep the end-to-end numbers honest (no cached responses) and the working tree clean
+        app.csv_result_cache = app.FileResultCache('', 0)
+        app.result_store = app.ResultStore(tmp, app.RESULT_STORE_TTL)
+        print(f"{'mission':>7} {'rows':>9} {'miss':>5} {'sci':>5} {'stage':>16} {'seconds':>9} {'rows/s':>11}"
+              + (f" {'vs prev':>8}" if previous else ''))
+        for mission in missions:
+            if not app.load_model(mission):
+                print(f"{mission} model could not be loaded, skipping")
+                continue
+            for n_rows in row_counts:
+                for missing_ratio in missing_ratios:
+                    for scientific_ratio in scientific_ratios:
+                        times, csv_size, e2e_mode = time_suite_case(
+                            mission, n_rows, missing_ratio, scientific_ratio,
+                            repeat if n_rows < 1_000_000 else 1)
+                        for stage in SUITE_STAGES:
+                            record = {
+                                'mission': mission, 'rows': n_rows, 'missing_ratio': missing_ratio,
+                                'scientific_ratio': scientific_ratio, 'stage': stage,
+                                'seconds': round(times[stage], 6),
+                                'rows_per_second': round(n_rows / times[stage], 1) if times[stage] else None,
+                                'csv_bytes': csv_size,
+                            }
+                            if stage == 'end_to_end':
+                                record['mode'] = e2e_mode
+                            records.append(record)
+                            line = (f"{mission:>7} {n_rows:>9,} {missing_ratio:>5g} {scientific_ratio:>5g} "
+                                    f"{stage:>16} {times[stage]:>9.4f} {record['rows_per_second'] or 0:>11,.0f}")
+                            before = previous.get((mission, n_rows, missing_ratio, scientific_ratio, stage))
+                            if before:
+                                line += f" {before / times[stage]:>7.2f}x"
+                            print(line)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({'metadata': run_metadata(), 'results': records}, f, indent=2)
+    print(f"Results written to {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ExoFinder microbenchmarks')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    coerce_parser = subparsers.add_parser('coerce', help='numeric coercion of raw CSV columns')
+    coerce_parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 1_000_000, 10_000_000])
+
+    predict_parser = subparsers.add_parser('predict', help='predict + predict_proba vs single predict_proba pass')
+    predict_parser.add_argument('--missions', nargs='+', default=list(app.MISSION_CONFIGS))
+    predict_parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 100_000])
+
+    engine_parser = subparsers.add_parser('engine', help='scikit-learn predict_proba vs flattened tree engine')
+    engine_parser.add_argument('--missions', nargs='+', default=list(app.MISSION_CONFIGS))
+    engine_parser.add_argument('--rows', type=int, nargs='+', default=[1, 100, 512, 10_000])
+
+    shards_parser = subparsers.add_parser('shards', help='sharded scoring of one large Kepler catalog, 1..N workers')
+    shards_parser.add_argument('--rows', type=int, default=1_000_000)
+    shards_parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    shards_parser.add_argument('--backend', choices=['thread', 'process'], default='thread')
+
+    ingest_parser = subparsers.add_parser('ingest', help='full vs column-pruned, compact-dtype CSV reads of a wide export')
+    ingest_parser.add_argument('--missions', nargs='+', default=list(app.MISSION_CONFIGS))
+    ingest_parser.add_argument('--rows', type=int, default=1_000_000)
+    ingest_parser.add_argument('--columns', type=int, default=200)
+
+    chat_parser = subparsers.add_parser('chat', help='/api/chat against a local Gemini stub: blocking vs SSE, pooling')
+    chat_parser.add_argument('--requests', type=int, default=20)
+    chat_parser.add_argument('--concurrency', type=int, default=16)
+
+    ratelimit_parser = subparsers.add_parser('ratelimit', help='chat rate limiter memory and cost with many distinct IPs')
+    ratelimit_parser.add_argument('--keys', type=int, default=100_000)
+    ratelimit_parser.add_argument('--request-interval', type=float, default=0.01)
+
+    rescore_parser = subparsers.add_parser('rescore', help='incremental re-scoring of an updated catalog via the score index')
+    rescore_parser.add_argument('--missions', nargs='+', default=list(app.MISSION_CONFIGS))
+    rescore_parser.add_argument('--rows', type=int, default=50_000)
+    rescore_parser.add_argument('--changed', type=int, default=300)
+
+    impute_parser = subparsers.add_parser('impute', help='chunked vs whole-file parity with per-upload medians and with a profile')
+    impute_parser.add_argument('--missions', nargs='+', default=list(app.MISSION_CONFIGS))
+    impute_parser.add_argument('--rows', type=int, default=2_000)
+    impute_parser.add_argument('--missing', type=float, default=0.2)
+    impute_parser.add_argument('--chunk-sizes', type=int, nargs='+', default=[500, 7, 1])
+
+    routing_parser = subparsers.add_parser('routing', help='mission=auto routing of the sample catalogs and a synthetic merged one')
+    routing_parser.add_argument('--rows', type=int, default=500, help='synthetic rows per mission')
+    routing_parser.add_argument('--sparsity', type=float, default=0.3, help='share of feature cells left empty')
+
+    startup_parser = subparsers.add_parser('startup', help='import time, time to ready and first-request latency, cold vs warmed')
+    startup_parser.add_argument('--repeat', type=int, default=5)
+    startup_parser.add_argument('--top', type=int, default=10, help='slowest top-level imports to list')
+
+    suite_parser = subparsers.add_parser('suite', help='per-stage timings on synthetic catalogs, written to a JSON file')
+    suite_parser.add_argument('--missions', nargs='+', default=list(app.MISSION_CONFIGS))
+    suite_parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    suite_parser.add_argument('--missing', type=float, nargs='+', default=[0.0, 0.2])
+    suite_parser.add_argument('--scientific', type=float, nargs='+', default=[0.0, 0.5])
+    suite_parser.add_argument('--repeat', type=int, default=3, help='runs per stage below 1M rows (best is kept)')
+    suite_parser.add_argument('--output', default=os.path.join(
+        'benchmark_results', f"suite-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"))
+    suite_parser.add_argument('--compare', help='earlier suite output to report speedups against')
+
+    args = parser.parse_args()
+    if args.benchmark == 'coerce':
+        bench_coerce(args.sizes)
+    elif args.benchmark == 'predict':
+        bench_predict(args.missions, args.rows)
+    elif args.benchmark == 'engine':
+        bench_engine(args.missions, args.rows)
+    elif args.benchmark == 'shards':
+        bench_shards(args.rows, args.max_workers, args.backend)
+    elif args.benchmark == 'ingest':
+        bench_ingest(args.missions, args.rows, args.columns)
+    elif args.benchmark == 'chat':
+        bench_chat(args.requests, args.concurrency)
+    elif args.benchmark == 'ratelimit':
+        bench_ratelimit(args.keys, args.request_interval)
+    elif args.benchmark == 'rescore':
+        bench_rescore(args.missions, args.rows, args.changed)
+    elif args.benchmark == 'impute':
+        bench_impute(args.missions, args.rows, args.missing, args.chunk_sizes)
+    elif args.benchmark == 'routing':
+        bench_routing(args.rows, args.sparsity)
+    elif args.benchmark == 'startup':
+        bench_startup(args.repeat, args.top)
+    elif args.benchmark == 'suite':
+        bench_suite(args.missions, args.rows, args.missing, args.scientific, args.output, args.compare, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
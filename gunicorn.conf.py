@@ -0,0 +1,35 @@
+"""
+Gunicorn configuration for ExoFinder.
+
+The app and all mission models are loaded once in the master process and shared
+copy-on-write by the forked workers, so no worker pays the model load latency on
+its first request and the model memory is not duplicated per worker.
+"""
+
+import os
+import tempfile
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = 120
+
+# Import app.py in the master so the models below are loaded before fork
+preload_app = True
+
+# Workers share one chat rate limit through a sqlite file, so the limit is not multiplied by
+# the number of workers
+os.environ.setdefault('CHAT_RATE_LIMIT_DB', os.path.join(tempfile.gettempdir(), 'exofinder_chat_rate_limit.sqlite'))
+
+
+def when_ready(server):
+    """Load and warm up every mission model in parallel in the master, before any worker is forked."""
+    import app
+    app.preload_models()
+
+
+def post_fork(server, worker):
+    """Report each worker's memory right after fork for comparison with the master."""
+    import app
+    rss, shared = app.process_memory_mb()
+    server.log.info(f"Worker {worker.pid} started: RSS {rss:.1f} MB, shared {shared:.1f} MB")
@@ -12,7 +12,7 @@ import sys
 os.environ['FLASK_ENV'] = 'production'
 
 # Import your existing Flask app (unchanged!)
-from app import app
+from app import app, start_warmup
 
 if __name__ == "__main__":
     # Hugging Face Spaces uses port 7860 by default
@@ -21,6 +21,9 @@ if __name__ == "__main__":
     print("🚀 Starting ExoFinder on Hugging Face Spaces...")
     print(f"🌐 Running on port {port}")
     
+    # Load the mission models in the background so the first visitor doesn't wait for them
+    start_warmup()
+    
     # Run your Flask app exactly as it is
     app.run(
         host="0.0.0.0",
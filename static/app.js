@@ -1,8 +1,17 @@
 // Global variables
 let currentResults = [];
+let currentResultId = null; // Server-side result ID for downloads
+// Catalog formats accepted by /predict_csv (the server detects the format from the file contents)
+const SUPPORTED_UPLOAD_EXTENSIONS = ['.csv', '.gz', '.zst', '.zstd', '.parquet', '.pq', '.feather', '.arrow', '.ipc', '.arrows'];
 let selectedMission = 'kepler'; // Default mission
 let sortColumn = -1;
 let sortDirection = 'asc';
+// Results table window: stored results are fetched from /results/<id> a page at a time as rows scroll into view
+const RESULTS_PAGE_SIZE = 200;
+const RESULTS_OVERSCAN_ROWS = 10;
+let resultsRowHeight = 37; // px, re-measured from the first rendered row
+let resultsView = {generation: 0, matched: 0, total: 0, pages: new Map(), pending: new Set(), localRows: []};
+let resultsRenderQueued = false;
 let selectedFeatures = {
     kepler: ['koi_period', 'koi_prad', 'koi_teq', 'koi_insol', 'koi_dor'],
     tess: ['Tmag', 'Teff', 'logg', 'MH', 'rad'],
@@ -31,6 +40,7 @@ document.addEventListener('DOMContentLoaded', function() {
     initializeDownloadButton();
     initializeMissionSelection();
     initializeTableSorting();
+    initializeResultsTable();
     initializeTooltips();
     initializeSpaceNavigation();
     // Initialize Bootstrap tooltips
@@ -523,6 +533,9 @@ function updateUIForMission(mission) {
     
     // Clear existing results when switching missions
     currentResults = [];
+    currentResultId = null;
+    sortColumn = -1;
+    resultsView.generation++;
     hideResults();
     hideManualResult();
 }
@@ -657,8 +670,8 @@ function handleFileUpload() {
     if (handleFileUpload.processing) return;
     handleFileUpload.processing = true;
     
-    if (!file.name.toLowerCase().endsWith('.csv')) {
-        showError('Please select a CSV file.');
+    if (!SUPPORTED_UPLOAD_EXTENSIONS.some(ext => file.name.toLowerCase().endsWith(ext))) {
+        showError('Please select a CSV (optionally .gz or .zst), Parquet, Feather or Arrow file.');
         handleFileUpload.processing = false;
         return;
     }
@@ -732,7 +745,8 @@ function handleCsvPrediction() {
         csvPredictSection.style.display = 'none';
     }
     
-    fetch('/predict_csv', {
+    // Only counts come back; the table fetches the stored rows page by page
+    fetch('/predict_csv?format=summary', {
         method: 'POST',
         body: formData
     })
@@ -746,7 +760,8 @@ function handleCsvPrediction() {
                 csvPredictSection.style.display = 'block';
             }
         } else {
-            displayResults(data.predictions || data.results, data.mission);
+            currentResultId = data.result_id || null;
+            displayResults(data);
         }
     })
     .catch(error => {
@@ -993,7 +1008,7 @@ class ExoAIAssistant {
         this.showLoading(true);
         
         try {
-            const response = await fetch('/api/chat', {
+            const response = await fetch('/api/chat?stream=sse', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -1001,6 +1016,11 @@ class ExoAIAssistant {
                 body: JSON.stringify({ message: message })
             });
             
+            if (response.ok && (response.headers.get('Content-Type') || '').startsWith('text/event-stream')) {
+                await this.readStreamedReply(response);
+                return;
+            }
+            
             const data = await response.json();
             
             if (response.ok && data.status === 'success') {
@@ -1021,6 +1041,40 @@ class ExoAIAssistant {
         }
     }
     
+    async readStreamedReply(response) {
+        // Render the answer as its server-sent events arrive: {delta}, then {done} or {error}
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let text = '';
+        let contentDiv = null;
+        
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            
+            const events = buffer.split('\n\n');
+            buffer = events.pop();
+            for (const event of events) {
+                if (!event.startsWith('data: ')) continue;
+                const data = JSON.parse(event.slice(6));
+                if (data.delta) {
+                    text += data.delta;
+                    if (!contentDiv) {
+                        this.showLoading(false);
+                        contentDiv = this.addMessage(text, 'assistant');
+                    } else {
+                        contentDiv.innerHTML = this.formatMessage(text);
+                        this.scrollToBottom();
+                    }
+                } else if (data.error) {
+                    this.addMessage(`❌ ${data.error}`, 'assistant');
+                }
+            }
+        }
+    }
+    
     addMessage(content, sender) {
         const messageDiv = document.createElement('div');
         messageDiv.className = `exoai-message exoai-${sender}`;
@@ -1036,6 +1090,7 @@ class ExoAIAssistant {
         this.messagesContainer.appendChild(messageDiv);
         
         this.scrollToBottom();
+        return contentDiv;
     }
     
     formatMessage(content) {
@@ -1249,11 +1304,23 @@ function initializeDownloadButton() {
     if (!downloadBtn) return;
     
     downloadBtn.addEventListener('click', function() {
-        if (currentResults.length === 0) {
+        if (!currentResultId && currentResults.length === 0) {
             alert('No results to download');
             return;
         }
         
+        // Results stored on the server are streamed straight to the browser's download
+        if (currentResultId) {
+            const a = document.createElement('a');
+            a.style.display = 'none';
+            a.href = `/download_results/${currentResultId}`;
+            a.download = 'exoplanet_predictions.csv';
+            document.body.appendChild(a);
+            a.click();
+            document.body.removeChild(a);
+            return;
+        }
+        
         fetch('/download_results', {
             method: 'POST',
             headers: {
@@ -1290,6 +1357,12 @@ function initializeTableSorting() {
     });
 }
 
+// Sort key of each results table column for the selected mission
+function resultsSortColumn(column) {
+    const identifier1 = {kepler: 'kepoi_name', k2: 'pl_name', tess: 'toi'}[selectedMission];
+    return ['Predicted_Class', 'Confidence', identifier1, 'kepler_name', 'RowID'][column] || null;
+}
+
 function sortTable(column) {
     if (sortColumn === column) {
         sortDirection = sortDirection === 'asc' ? 'desc' : 'asc';
@@ -1308,34 +1381,121 @@ function sortTable(column) {
         currentTh.classList.add(`sorted-${sortDirection}`);
     }
     
-    // Sort the results
-    currentResults.sort((a, b) => {
-        let aVal, bVal;
-        
-        switch(column) {
-            case 0: // Predicted Class
-                aVal = a.Predicted_Class || '';
-                bVal = b.Predicted_Class || '';
-                break;
-            case 1: // Confidence
-                aVal = parseFloat(a.Confidence) || 0;
-                bVal = parseFloat(b.Confidence) || 0;
-                break;
-            case 2: // Identifier 1
-                aVal = a.kepoi_name || a.pl_name || '';
-                bVal = b.kepoi_name || b.pl_name || '';
-                break;
-            case 3: // Identifier 2
-                aVal = a.kepler_name || '';
-                bVal = b.kepler_name || '';
-                break;
-            default:
-                return 0;
+    resetResultsView();
+}
+
+// Results table: scrolling, filters and the windowed row source
+function initializeResultsTable() {
+    const container = resultsTableBody ? resultsTableBody.closest('.results-table-compact') : null;
+    if (container) {
+        container.addEventListener('scroll', scheduleRenderTable, {passive: true});
+    }
+    
+    const classFilter = document.getElementById('resultsClassFilter');
+    if (classFilter) {
+        classFilter.addEventListener('change', resetResultsView);
+    }
+    
+    const minConfidence = document.getElementById('resultsMinConfidence');
+    if (minConfidence) {
+        let debounce = null;
+        minConfidence.addEventListener('input', function() {
+            clearTimeout(debounce);
+            debounce = setTimeout(resetResultsView, 300);
+        });
+    }
+}
+
+function resultsFilters() {
+    const classFilter = document.getElementById('resultsClassFilter');
+    const minConfidence = document.getElementById('resultsMinConfidence');
+    const percent = minConfidence ? parseFloat(minConfidence.value) : NaN;
+    return {
+        predictedClass: classFilter ? classFilter.value : '',
+        minConfidence: isNaN(percent) ? null : percent / 100
+    };
+}
+
+// Start the table over (new results, sort or filter): drop loaded pages and scroll back to the top
+function resetResultsView() {
+    resultsView = {
+        generation: resultsView.generation + 1,
+        matched: 0,
+        total: resultsView.total,
+        pages: new Map(),
+        pending: new Set(),
+        localRows: []
+    };
+    
+    const container = resultsTableBody ? resultsTableBody.closest('.results-table-compact') : null;
+    if (container) {
+        container.scrollTop = 0;
+    }
+    
+    if (currentResultId) {
+        fetchResultsPage(0);
+    } else {
+        // Results without a server-side copy are filtered and sorted in the browser
+        resultsView.localRows = filterAndSortLocal(currentResults);
+        resultsView.matched = resultsView.localRows.length;
+        renderTable();
+    }
+}
+
+function fetchResultsPage(pageIndex) {
+    if (resultsView.pages.has(pageIndex) || resultsView.pending.has(pageIndex)) return;
+    resultsView.pending.add(pageIndex);
+    const generation = resultsView.generation;
+    
+    const params = new URLSearchParams({offset: pageIndex * RESULTS_PAGE_SIZE, limit: RESULTS_PAGE_SIZE});
+    const sortKey = resultsSortColumn(sortColumn);
+    if (sortKey) {
+        params.set('sort', sortKey);
+        params.set('order', sortDirection);
+    }
+    const filters = resultsFilters();
+    if (filters.predictedClass) params.set('class', filters.predictedClass);
+    if (filters.minConfidence !== null) params.set('min_confidence', filters.minConfidence);
+    
+    fetch(`/results/${currentResultId}?${params}`)
+    .then(response => response.json())
+    .then(data => {
+        // Ignore pages of a view the user has already moved away from
+        if (generation !== resultsView.generation) return;
+        resultsView.pending.delete(pageIndex);
+        if (data.error) {
+            showError(data.error);
+            return;
         }
+        resultsView.pages.set(pageIndex, data.results);
+        resultsView.matched = data.matched_rows;
+        resultsView.total = data.total_rows;
+        updateResultsCount();
+        renderTable();
+    })
+    .catch(error => {
+        if (generation !== resultsView.generation) return;
+        resultsView.pending.delete(pageIndex);
+        showError('Error loading results: ' + error.message);
+    });
+}
+
+function filterAndSortLocal(results) {
+    const filters = resultsFilters();
+    const rows = results.filter(result =>
+        (!filters.predictedClass || result.Predicted_Class === filters.predictedClass) &&
+        (filters.minConfidence === null || result.Confidence >= filters.minConfidence)
+    );
+    const sortKey = resultsSortColumn(sortColumn);
+    if (!sortKey) return rows;
+    
+    return rows.sort((a, b) => {
+        let aVal = a[sortKey] === undefined || a[sortKey] === null ? '' : a[sortKey];
+        let bVal = b[sortKey] === undefined || b[sortKey] === null ? '' : b[sortKey];
         
         if (typeof aVal === 'string') {
             aVal = aVal.toLowerCase();
-            bVal = bVal.toLowerCase();
+            bVal = String(bVal).toLowerCase();
         }
         
         if (sortDirection === 'asc') {
@@ -1344,21 +1504,42 @@ function sortTable(column) {
             return aVal > bVal ? -1 : aVal < bVal ? 1 : 0;
         }
     });
-    
-    // Re-render the table
-    renderTable();
 }
 
 // Display functions
-function displayResults(results, mission) {
-    currentResults = results;
-    renderTable();
-    
-    if (resultsCount) {
-        resultsCount.textContent = `${results.length} predictions`;
+function displayResults(data) {
+    // Summary responses carry counts and a result ID; records responses carry the rows themselves
+    currentResults = data.results || [];
+    resultsView.total = data.total_rows || currentResults.length;
+    
+    const classFilter = document.getElementById('resultsClassFilter');
+    if (classFilter) {
+        const counts = data.class_counts || {};
+        classFilter.innerHTML = '<option value="">All classes</option>';
+        Object.keys(counts).sort().forEach(label => {
+            const option = document.createElement('option');
+            option.value = label;
+            option.textContent = `${label} (${counts[label]})`;
+            classFilter.appendChild(option);
+        });
+    }
+    const minConfidence = document.getElementById('resultsMinConfidence');
+    if (minConfidence) {
+        minConfidence.value = '';
     }
     
     showResults();
+    resetResultsView();
+    updateResultsCount();
+}
+
+function updateResultsCount() {
+    if (!resultsCount) return;
+    const filters = resultsFilters();
+    const filtered = filters.predictedClass || filters.minConfidence !== null;
+    resultsCount.textContent = filtered
+        ? `${resultsView.matched} of ${resultsView.total} predictions`
+        : `${resultsView.total} predictions`;
 }
 
 // Display batch results for simplified interface
@@ -1383,68 +1564,135 @@ function displayBatchResults(predictions) {
     resultsContainer.style.display = 'block';
 }
 
+function scheduleRenderTable() {
+    if (resultsRenderQueued) return;
+    resultsRenderQueued = true;
+    requestAnimationFrame(() => {
+        resultsRenderQueued = false;
+        renderTable();
+    });
+}
+
+// Render only the rows in (and just around) the visible part of the table; spacer rows keep the scrollbar honest
 function renderTable() {
     if (!resultsTableBody) return;
+    const container = resultsTableBody.closest('.results-table-compact');
+    const total = resultsView.matched;
+    const viewportHeight = container ? container.clientHeight || 330 : 330;
+    const scrollTop = container ? container.scrollTop : 0;
+    
+    const first = Math.max(0, Math.floor(scrollTop / resultsRowHeight) - RESULTS_OVERSCAN_ROWS);
+    const last = Math.min(total, Math.ceil((scrollTop + viewportHeight) / resultsRowHeight) + RESULTS_OVERSCAN_ROWS);
+    
+    const fragment = document.createDocumentFragment();
+    fragment.appendChild(createSpacerRow(first * resultsRowHeight));
+    for (let i = first; i < last; i++) {
+        fragment.appendChild(createResultRow(resultRowAt(i)));
+    }
+    fragment.appendChild(createSpacerRow((total - last) * resultsRowHeight));
+    resultsTableBody.replaceChildren(fragment);
+    
+    // Measure real row height once rows are on screen, so spacer heights match
+    const sample = resultsTableBody.querySelector('tr.result-row');
+    if (sample && sample.offsetHeight && Math.abs(sample.offsetHeight - resultsRowHeight) > 1) {
+        resultsRowHeight = sample.offsetHeight;
+        scheduleRenderTable();
+    }
+}
+
+// Row i of the current view, or null while its page is still loading
+function resultRowAt(index) {
+    if (!currentResultId) {
+        return resultsView.localRows[index] || null;
+    }
+    const pageIndex = Math.floor(index / RESULTS_PAGE_SIZE);
+    const page = resultsView.pages.get(pageIndex);
+    if (!page) {
+        fetchResultsPage(pageIndex);
+        return null;
+    }
+    return page[index % RESULTS_PAGE_SIZE] || null;
+}
+
+function createSpacerRow(height) {
+    const row = document.createElement('tr');
+    row.className = 'results-spacer';
+    const cell = document.createElement('td');
+    cell.colSpan = 5;
+    cell.style.height = `${height}px`;
+    cell.style.padding = '0';
+    cell.style.border = '0';
+    row.appendChild(cell);
+    return row;
+}
+
+function createResultRow(result) {
+    const row = document.createElement('tr');
+    row.className = 'result-row';
+    
+    if (!result) {
+        // Placeholder until the row's page arrives
+        const loadingCell = document.createElement('td');
+        loadingCell.colSpan = 5;
+        loadingCell.className = 'text-muted';
+        loadingCell.textContent = 'Loading...';
+        row.appendChild(loadingCell);
+        return row;
+    }
     
-    resultsTableBody.innerHTML = '';
+    // Predicted Class with color coding
+    const classCell = document.createElement('td');
+    const classBadge = document.createElement('span');
+    classBadge.className = `badge ${getPredictionBadgeClass(result.Predicted_Class)}`;
+    classBadge.textContent = result.Predicted_Class;
+    classCell.appendChild(classBadge);
+    row.appendChild(classCell);
+    
+    // Confidence
+    const confidenceCell = document.createElement('td');
+    confidenceCell.textContent = (result.Confidence * 100).toFixed(1) + '%';
+    row.appendChild(confidenceCell);
+    
+    // Identifier columns (mission-specific)
+    if (selectedMission === 'kepler') {
+        // KepOI Name
+        const koiCell = document.createElement('td');
+        koiCell.textContent = result.kepoi_name || 'N/A';
+        row.appendChild(koiCell);
+        
+        // Kepler Name
+        const keplerCell = document.createElement('td');
+        keplerCell.textContent = result.kepler_name || 'N/A';
+        row.appendChild(keplerCell);
+    } else if (selectedMission === 'k2') {
+        // Planet Name
+        const nameCell = document.createElement('td');
+        nameCell.textContent = result.pl_name || 'N/A';
+        row.appendChild(nameCell);
+        
+        // Empty cell for second identifier (K2 only has one identifier)
+        const emptyCell = document.createElement('td');
+        emptyCell.textContent = '';
+        emptyCell.style.display = 'none'; // Hide since K2 only shows one identifier column
+        row.appendChild(emptyCell);
+    } else if (selectedMission === 'tess') {
+        // TESS has toi identifier column
+        const nameCell = document.createElement('td');
+        nameCell.textContent = result.toi || 'N/A';
+        row.appendChild(nameCell);
+        
+        const emptyCell = document.createElement('td');
+        emptyCell.textContent = '';
+        emptyCell.style.display = 'none'; // Hide second identifier column for TESS
+        row.appendChild(emptyCell);
+    }
     
-    currentResults.forEach(result => {
-        const row = document.createElement('tr');
-        
-        // Predicted Class with color coding
-        const classCell = document.createElement('td');
-        const classBadge = document.createElement('span');
-        classBadge.className = `badge ${getPredictionBadgeClass(result.Predicted_Class)}`;
-        classBadge.textContent = result.Predicted_Class;
-        classCell.appendChild(classBadge);
-        row.appendChild(classCell);
-        
-        // Confidence
-        const confidenceCell = document.createElement('td');
-        confidenceCell.textContent = (result.Confidence * 100).toFixed(1) + '%';
-        row.appendChild(confidenceCell);
-        
-        // Identifier columns (mission-specific)
-        if (selectedMission === 'kepler') {
-            // KepOI Name
-            const koiCell = document.createElement('td');
-            koiCell.textContent = result.kepoi_name || 'N/A';
-            row.appendChild(koiCell);
-            
-            // Kepler Name
-            const keplerCell = document.createElement('td');
-            keplerCell.textContent = result.kepler_name || 'N/A';
-            row.appendChild(keplerCell);
-        } else if (selectedMission === 'k2') {
-            // Planet Name
-            const nameCell = document.createElement('td');
-            nameCell.textContent = result.pl_name || 'N/A';
-            row.appendChild(nameCell);
-            
-            // Empty cell for second identifier (K2 only has one identifier)
-            const emptyCell = document.createElement('td');
-            emptyCell.textContent = '';
-            emptyCell.style.display = 'none'; // Hide since K2 only shows one identifier column
-            row.appendChild(emptyCell);
-        } else if (selectedMission === 'tess') {
-            // TESS has toi identifier column
-            const nameCell = document.createElement('td');
-            nameCell.textContent = result.toi || 'N/A';
-            row.appendChild(nameCell);
-            
-            const emptyCell = document.createElement('td');
-            emptyCell.textContent = '';
-            emptyCell.style.display = 'none'; // Hide second identifier column for TESS
-            row.appendChild(emptyCell);
-        }
-        
-        // Row ID column (always present for all missions)
-        const rowIdCell = document.createElement('td');
-        rowIdCell.textContent = result.RowID || result.row_id || result.Row_ID || 'N/A';
-        row.appendChild(rowIdCell);
-        
-        resultsTableBody.appendChild(row);
-    });
+    // Row ID column (always present for all missions)
+    const rowIdCell = document.createElement('td');
+    rowIdCell.textContent = result.RowID || result.row_id || result.Row_ID || 'N/A';
+    row.appendChild(rowIdCell);
+    
+    return row;
 }
 
 function displayManualResult(result) {
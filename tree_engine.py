@@ -0,0 +1,140 @@
+"""
+Flattened, array-backed inference for the ExoFinder tree ensembles.
+
+Random forests (and the forest members of a stacked model) are converted once into
+contiguous numpy arrays - split feature, threshold, children and normalised leaf
+class distributions for every node of every tree - and a batch is evaluated by
+advancing every (row, tree) cursor still at a split node in one vectorized step.
+This removes scikit-learn's per-tree call overhead, which dominates small batches
+such as /predict_manual requests. The engine is meant for small batches only: larger
+ones go back to scikit-learn's compiled traversal (see MAX_ROWS).
+Probabilities match scikit-learn's predict_proba to float tolerance.
+"""
+
+import os
+
+import numpy as np
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier, StackingClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+# Batches larger than this go back to scikit-learn's compiled traversal, which wins once
+# per-call overhead is amortised (0 = always use the flat engine, whose working memory
+# grows with rows x trees)
+MAX_ROWS = int(os.environ.get('TREE_ENGINE_MAX_ROWS', 512))
+
+FOREST_TYPES = (RandomForestClassifier, ExtraTreesClassifier)
+
+
+class FlatForest:
+    """All trees of a forest classifier packed into shared node arrays."""
+
+    def __init__(self, trees, classes, fallback=None):
+        self.classes_ = classes
+        self.fallback = fallback
+        features, thresholds, children, values, missing_left, leaves, roots = [], [], [], [], [], [], []
+        offset = 0
+        for tree in trees:
+            t = tree.tree_
+            n_nodes = t.node_count
+            node_ids = np.arange(n_nodes)
+            is_leaf = t.children_left == -1
+
+            # Leaves point back at themselves so child lookups never index out of range
+            left = np.where(is_leaf, node_ids, t.children_left) + offset
+            right = np.where(is_leaf, node_ids, t.children_right) + offset
+            leaves.append(is_leaf)
+            features.append(np.where(is_leaf, 0, t.feature))
+            thresholds.append(np.where(is_leaf, np.inf, t.threshold))
+            children.append(np.column_stack([left, right]))
+
+            # Per-tree predict_proba normalises the leaf class weights
+            value = t.value[:, 0, :].astype(np.float64)
+            totals = value.sum(axis=1, keepdims=True)
+            totals[totals == 0.0] = 1.0
+            values.append(value / totals)
+
+            # Trees trained with missing-value support record where NaNs go
+            missing = getattr(t, 'missing_go_to_left', None)
+            missing_left.append(np.zeros(n_nodes, dtype=bool) if missing is None else missing.astype(bool))
+
+            roots.append(offset)
+            offset += n_nodes
+
+        self.feature = np.ascontiguousarray(np.concatenate(features), dtype=np.intp)
+        self.threshold = np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64)
+        self.children = np.ascontiguousarray(np.concatenate(children), dtype=np.intp)
+        self.value = np.ascontiguousarray(np.concatenate(values))
+        self.missing_left = np.concatenate(missing_left)
+        self.has_missing_left = bool(self.missing_left.any())
+        self.is_leaf = np.concatenate(leaves)
+        self.roots = np.asarray(roots, dtype=np.intp)
+
+    def _predict(self, X):
+        n_rows, n_features = X.shape
+        n_trees = len(self.roots)
+        flat_X = X.ravel()
+
+        # One cursor per (row, tree) pair; only pairs still at a split node take another step
+        node = np.tile(self.roots, n_rows)
+        row_offset = np.repeat(np.arange(n_rows, dtype=np.intp) * n_features, n_trees)
+        active = np.flatnonzero(~self.is_leaf[node])
+        while active.size:
+            current = node[active]
+            x = flat_X[row_offset[active] + self.feature[current]]
+            # NaN fails the <= test and goes right unless the split sends missing values left
+            go_left = x <= self.threshold[current]
+            if self.has_missing_left:
+                go_left |= np.isnan(x) & self.missing_left[current]
+            current = self.children[current, (~go_left).view(np.int8)]
+            node[active] = current
+            active = active[~self.is_leaf[current]]
+        return self.value[node].reshape(n_rows, n_trees, -1).mean(axis=1)
+
+    def predict_proba(self, X):
+        if self.fallback is not None and 0 < MAX_ROWS < len(X):
+            return self.fallback.predict_proba(X)
+        # Trees compare float32 inputs against float64 thresholds, like scikit-learn
+        return self._predict(np.ascontiguousarray(X, dtype=np.float32))
+
+
+class FlatStacking:
+    """Stacked classifier whose forest members run on FlatForest; other members use scikit-learn."""
+
+    def __init__(self, model):
+        self.model = model
+        self.classes_ = model.classes_
+        self.estimators = []
+        for estimator, method in zip(model.estimators_, model.stack_method_):
+            if estimator == 'drop':
+                continue
+            if method == 'predict_proba' and isinstance(estimator, FOREST_TYPES):
+                estimator = FlatForest(estimator.estimators_, estimator.classes_, fallback=estimator)
+            self.estimators.append((estimator, method))
+
+    def predict_proba(self, X):
+        meta_features = []
+        for estimator, method in self.estimators:
+            predictions = getattr(estimator, method)(X)
+            if predictions.ndim == 1:
+                predictions = predictions.reshape(-1, 1)
+            elif method == 'predict_proba' and len(self.classes_) == 2:
+                # Binary problems keep only the positive-class column, as StackingClassifier does
+                predictions = predictions[:, 1:]
+            meta_features.append(predictions)
+        if self.model.passthrough:
+            meta_features.append(np.asarray(X))
+        return self.model.final_estimator_.predict_proba(np.hstack(meta_features))
+
+
+def compile_model(model):
+    """Convert a fitted forest, decision tree or stacked classifier into a flat inference engine.
+
+    Raises ValueError for model types the engine cannot represent.
+    """
+    if isinstance(model, FOREST_TYPES):
+        return FlatForest(model.estimators_, model.classes_, fallback=model)
+    if isinstance(model, DecisionTreeClassifier):
+        return FlatForest([model], model.classes_, fallback=model)
+    if isinstance(model, StackingClassifier):
+        return FlatStacking(model)
+    raise ValueError(f"Flat tree engine does not support {type(model).__name__}")